@@ -0,0 +1,286 @@
+"""Streaming alert rules over the inspection ingest path.
+
+Every inspection inserted through the API updates sliding-window counters
+for its station and its operator, and the rules are re-evaluated for those
+two keys only. That is O(1) per inspection, under one lock, with no
+database access. Alerts that fire are queued and written to ``alerts`` by
+a background task, which then hands them to ``on_alerts`` for cache
+invalidation and Socket.IO pushes.
+
+Rules (thresholds in ``ALERT_RULES`` in backend.py):
+    defect_rate             failed / total over the window
+    confidence_drift        window mean confidence below the key's long-run mean
+    processing_time_spike   window mean processing time above the long-run mean
+
+The long-run means are EWMAs of the buckets leaving the window, so the
+baseline never includes the samples it is compared with.
+
+An alert fires once per episode: it re-arms when the condition clears, and
+not before ``cooldown`` seconds have passed since the last one for the same
+(rule, key). Each worker evaluates the inspections it ingested itself.
+"""
+from datetime import datetime
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+DIMENSIONS = ("station", "operator")
+DIMENSION_LABELS = {"station": "Station", "operator": "Opérateur"}
+
+
+class _Window:
+    """Counters over the last ``len(buckets) * bucket_seconds`` seconds, in fixed time buckets."""
+
+    __slots__ = ("bucket_seconds", "alpha", "buckets", "head", "head_slot",
+                 "total", "failed", "conf_sum", "conf_count", "pt_sum", "pt_count",
+                 "conf_mean", "pt_mean")
+
+    def __init__(self, bucket_count, bucket_seconds, alpha):
+        self.bucket_seconds = bucket_seconds
+        self.alpha = alpha
+        self.buckets = [[0, 0, 0.0, 0, 0.0, 0] for _ in range(bucket_count)]
+        self.head = 0          # index of the current bucket
+        self.head_slot = None  # absolute time slot of the current bucket
+        self.total = self.failed = self.conf_count = self.pt_count = 0
+        self.conf_sum = self.pt_sum = 0.0
+        self.conf_mean = self.pt_mean = None  # EWMA of expired buckets
+
+    def advance(self, now):
+        slot = int(now // self.bucket_seconds)
+        if self.head_slot is None:
+            self.head_slot = slot
+            return
+        # Each step clears one expired bucket: amortized O(1) per observation
+        for _ in range(min(slot - self.head_slot, len(self.buckets))):
+            self.head = (self.head + 1) % len(self.buckets)
+            expired = self.buckets[self.head]
+            self.total -= expired[0]
+            self.failed -= expired[1]
+            self.conf_sum -= expired[2]
+            self.conf_count -= expired[3]
+            self.pt_sum -= expired[4]
+            self.pt_count -= expired[5]
+            if expired[3]:
+                self.conf_mean = self._ewma(self.conf_mean, expired[2] / expired[3])
+            if expired[5]:
+                self.pt_mean = self._ewma(self.pt_mean, expired[4] / expired[5])
+            self.buckets[self.head] = [0, 0, 0.0, 0, 0.0, 0]
+        self.head_slot = max(self.head_slot, slot)
+
+    def _ewma(self, mean, value):
+        return value if mean is None else mean + self.alpha * (value - mean)
+
+    def add(self, failed, confidence, processing_time):
+        bucket = self.buckets[self.head]
+        bucket[0] += 1
+        self.total += 1
+        if failed:
+            bucket[1] += 1
+            self.failed += 1
+        if confidence > 0:
+            bucket[2] += confidence
+            bucket[3] += 1
+            self.conf_sum += confidence
+            self.conf_count += 1
+        if processing_time > 0:
+            bucket[4] += processing_time
+            bucket[5] += 1
+            self.pt_sum += processing_time
+            self.pt_count += 1
+
+    def defect_rate(self):
+        return self.failed / self.total * 100 if self.total else 0.0
+
+
+class AlertEngine:
+    """Sliding-window rules per station and operator; see the module docstring."""
+
+    def __init__(self, connection, rules, window_seconds=600, bucket_seconds=10, cooldown=900,
+                 baseline_alpha=0.05, on_alerts=None, start_task=None, clock=time.monotonic):
+        self._connection = connection
+        self.rules = rules
+        self.bucket_count = max(1, int(window_seconds // bucket_seconds))
+        self.bucket_seconds = bucket_seconds
+        self.cooldown = cooldown
+        self.baseline_alpha = baseline_alpha
+        self.on_alerts = on_alerts  # callback(list of alert dicts with their ids)
+        self._start_task = start_task or self._start_thread
+        self._clock = clock
+
+        self._lock = threading.Lock()
+        self._windows = {}    # (dimension, value) -> _Window
+        self._active = {}     # (rule, dimension, value) -> alert dict while the condition holds
+        self._last_fired = {}  # (rule, dimension, value) -> clock time
+        self._outbox = []
+        self._wakeup = threading.Event()
+        self._task = None
+        self.fired = 0
+        self.suppressed = 0
+        self.write_failures = 0
+
+    # ------------------------------------------------------------------
+    # Hot path
+    # ------------------------------------------------------------------
+    def observe_many(self, inspections):
+        now = self._clock()
+        fired = []
+        with self._lock:
+            for inspection in inspections:
+                failed = inspection.get("status") == "failed"
+                confidence = float(inspection.get("confidence") or 0)
+                processing_time = float(inspection.get("processing_time") or 0)
+                for dimension in DIMENSIONS:
+                    value = inspection.get(dimension)
+                    if not value:
+                        continue
+                    window = self._windows.get((dimension, value))
+                    if window is None:
+                        window = self._windows[(dimension, value)] = _Window(self.bucket_count, self.bucket_seconds, self.baseline_alpha)
+                    window.advance(now)
+                    window.add(failed, confidence, processing_time)
+                    fired.extend(self._evaluate(dimension, value, window, now))
+            if fired:
+                self._outbox.extend(fired)
+        if fired:
+            self._ensure_started()
+            self._wakeup.set()
+        return fired
+
+    def _evaluate(self, dimension, value, window, now):
+        fired = []
+        conf_baseline, pt_baseline = window.conf_mean, window.pt_mean
+        for rule, config in self.rules.items():
+            if window.total < config.get("min_samples", 1):
+                continue
+            alert = None
+            if rule == "defect_rate":
+                rate = window.defect_rate()
+                if rate >= config["threshold"]:
+                    level = "critical" if rate >= config.get("critical", float("inf")) else config.get("level", "warning")
+                    alert = (level, rate, f"Taux de défauts élevé: {rate:.1f}% sur les {window.total} dernières inspections")
+            elif rule == "confidence_drift" and conf_baseline is not None and window.conf_count:
+                mean = window.conf_sum / window.conf_count
+                if conf_baseline - mean >= config["drop"]:
+                    alert = (config.get("level", "warning"), mean,
+                             f"Confiance en baisse: {mean:.1f}% (habituellement {conf_baseline:.1f}%)")
+            elif rule == "processing_time_spike" and pt_baseline and window.pt_count:
+                mean = window.pt_sum / window.pt_count
+                if mean >= pt_baseline * config["factor"]:
+                    alert = (config.get("level", "warning"), mean,
+                             f"Temps de traitement anormal: {mean:.2f}s (habituellement {pt_baseline:.2f}s)")
+
+            key = (rule, dimension, value)
+            if alert is None:
+                self._active.pop(key, None)  # episode over: the rule re-arms
+                continue
+            if key in self._active:
+                continue  # same episode, already reported
+            last = self._last_fired.get(key)
+            if last is not None and now - last < self.cooldown:
+                self.suppressed += 1
+                continue
+            level, observed, text = alert
+            self._last_fired[key] = now
+            self._active[key] = record = {
+                "rule": rule,
+                "dimension": dimension,
+                "value": value,
+                "level": level,
+                "observed": round(observed, 2),
+                "message": f"{DIMENSION_LABELS[dimension]} {value} — {text}",
+                "created_at": datetime.now().replace(microsecond=0),
+            }
+            self.fired += 1
+            fired.append(record)
+        return fired
+
+    # ------------------------------------------------------------------
+    # Background writer
+    # ------------------------------------------------------------------
+    @staticmethod
+    def _start_thread(target):
+        thread = threading.Thread(target=target, name="alert-writer", daemon=True)
+        thread.start()
+        return thread
+
+    def _ensure_started(self):
+        if self._task is not None:
+            return
+        with self._lock:
+            if self._task is not None:
+                return
+            self._task = self._start_task(self._run)
+
+    def _run(self):
+        while True:
+            self._wakeup.wait()
+            self._wakeup.clear()
+            with self._lock:
+                batch, self._outbox = self._outbox, []
+            if not batch:
+                continue
+            try:
+                self.write(batch)
+            except Exception as e:
+                self.write_failures += 1
+                logger.error(f"Error writing {len(batch)} alert(s): {e}")
+                continue
+            if self.on_alerts is not None:
+                try:
+                    self.on_alerts(batch)
+                except Exception as e:
+                    logger.error(f"Error publishing alerts: {e}")
+
+    def write(self, alerts):
+        """INSERT the alerts (one round trip per alert for their ids, one transaction)."""
+        with self._connection() as conn, conn.cursor() as cursor:
+            conn.begin()
+            try:
+                for alert in alerts:
+                    cursor.execute("INSERT INTO alerts (message, level, ack, created_at) VALUES (%s, %s, %s, %s)",
+                                   (alert["message"], alert["level"], False, alert["created_at"]))
+                    alert["id"] = cursor.lastrowid
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+        logger.warning(f"🚨 {len(alerts)} alert(s) raised: {'; '.join(a['message'] for a in alerts)}")
+
+    # ------------------------------------------------------------------
+    # Read side
+    # ------------------------------------------------------------------
+    def active_alerts(self):
+        with self._lock:
+            return [dict(alert) for alert in self._active.values()]
+
+    def window_summary(self, dimension="station"):
+        """{value: {"total", "defect_rate", ...}} over the current window"""
+        now = self._clock()
+        summary = {}
+        with self._lock:
+            for (window_dimension, value), window in self._windows.items():
+                if window_dimension != dimension:
+                    continue
+                window.advance(now)
+                if not window.total:
+                    continue
+                summary[value] = {
+                    "total": window.total,
+                    "defect_rate": round(window.defect_rate(), 2),
+                    "avg_confidence": round(window.conf_sum / window.conf_count, 2) if window.conf_count else None,
+                    "avg_processing_time": round(window.pt_sum / window.pt_count, 3) if window.pt_count else None,
+                }
+        return summary
+
+    def metrics(self):
+        with self._lock:
+            return {
+                "keys": len(self._windows),
+                "active": len(self._active),
+                "fired": self.fired,
+                "suppressed": self.suppressed,
+                "pending_writes": len(self._outbox),
+                "write_failures": self.write_failures,
+            }
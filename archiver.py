@@ -0,0 +1,233 @@
+"""Hot/cold split of the inspections table.
+
+Rows older than the hot window are moved out of ``inspections`` in small
+batches, either into the ``inspections_archive`` table (mode "table") or
+into gzip-compressed NDJSON files, one per batch (mode "files"). Each batch
+is one transaction that also adds the batch's per-station sums to
+``archive_totals``. The stats seed reads those sums, so totals do not move
+when rows are archived. Rollup rows are never archived.
+
+The listing and its indexes only cover the hot window. Archived rows are
+read back by ``iter_rows`` (the export endpoint and the rollup backfill).
+
+MySQL partitioning was not used: partitioned InnoDB tables cannot take part
+in foreign keys (inspection_defects references inspections), and every
+unique key would have to include the partition column.
+"""
+from datetime import datetime, timedelta
+import gzip
+import json
+import logging
+import os
+import threading
+import time
+
+import pymysql
+
+from stats_engine import COUNTER_COLUMNS
+
+logger = logging.getLogger(__name__)
+
+ARCHIVED_COLUMNS = (
+    "id", "pcb_id", "status", "defects", "operator", "station", "components",
+    "microbe_count", "image_path", "confidence", "processing_time", "timestamp", "created_at",
+)
+MODES = ("table", "files")
+
+
+def _json_default(value):
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def _decode_file_row(row):
+    for column in ("timestamp", "created_at"):
+        if row.get(column):
+            row[column] = datetime.fromisoformat(row[column])
+    return row
+
+
+class Archiver:
+    """Moves inspections older than ``hot_days`` out of the hot table.
+
+    ``connection`` is a zero-argument callable returning a context manager
+    that yields a DB connection (``backend.db_connection``).
+    """
+
+    def __init__(self, connection, hot_days=30, mode="table", archive_dir="archive", batch_size=5000,
+                 max_batches=100, pause=0.2, sleep=time.sleep):
+        if mode not in MODES:
+            raise ValueError(f"invalid archive mode: {mode!r} ({' or '.join(MODES)})")
+        self._connection = connection
+        self.hot_days = hot_days
+        self.mode = mode
+        self.archive_dir = archive_dir
+        self.batch_size = batch_size
+        self.max_batches = max_batches  # per run, so one run cannot hold the task forever
+        self.pause = pause              # between batches, lets ingest transactions through
+        self._sleep = sleep
+        self._lock = threading.Lock()  # one run at a time in this process
+        self._stats = {"runs": 0, "batches": 0, "rows": 0, "failures": 0, "last_run": None, "last_error": None}
+
+    def cutoff(self, now=None):
+        return (now or datetime.now()).replace(microsecond=0) - timedelta(days=self.hot_days)
+
+    def run_once(self, now=None):
+        """Archive batches until nothing is older than the cutoff (or ``max_batches``); returns rows moved."""
+        cutoff = self.cutoff(now)
+        moved = 0
+        with self._lock:
+            try:
+                for _ in range(self.max_batches):
+                    count = self.archive_batch(cutoff)
+                    moved += count
+                    if count < self.batch_size:
+                        break
+                    self._sleep(self.pause)
+            except Exception as e:
+                self._stats["failures"] += 1
+                self._stats["last_error"] = str(e)
+                raise
+            finally:
+                self._stats["runs"] += 1
+                self._stats["rows"] += moved
+                self._stats["last_run"] = datetime.now().isoformat()
+        if moved:
+            logger.info(f"🗄️  Archived {moved} inspections older than {cutoff} ({self.mode})")
+        return moved
+
+    def archive_batch(self, cutoff):
+        """Move one batch (the oldest rows first) in a single transaction; returns its size."""
+        with self._connection() as conn, conn.cursor() as cursor:
+            conn.begin()
+            try:
+                cursor.execute(f"""
+                    SELECT {', '.join(ARCHIVED_COLUMNS)} FROM inspections
+                    WHERE timestamp < %s
+                    ORDER BY timestamp, id LIMIT %s
+                    FOR UPDATE
+                """, (cutoff, self.batch_size))
+                rows = cursor.fetchall()
+                if not rows:
+                    conn.rollback()
+                    return 0
+                ids = [row["id"] for row in rows]
+                placeholders = ", ".join(["%s"] * len(ids))
+
+                if self.mode == "table":
+                    columns = ", ".join(ARCHIVED_COLUMNS)
+                    cursor.execute(f"""
+                        INSERT IGNORE INTO inspections_archive ({columns})
+                        SELECT {columns} FROM inspections WHERE id IN ({placeholders})
+                    """, ids)
+                else:
+                    self._write_file(cursor, rows)
+
+                cursor.execute(f"""
+                    INSERT INTO archive_totals (station, total, passed, failed, pt_sum, pt_count, conf_sum, conf_count)
+                    SELECT COALESCE(station, ''), {COUNTER_COLUMNS}
+                    FROM inspections WHERE id IN ({placeholders})
+                    GROUP BY COALESCE(station, '')
+                    ON DUPLICATE KEY UPDATE
+                        total = total + VALUES(total), passed = passed + VALUES(passed),
+                        failed = failed + VALUES(failed), pt_sum = pt_sum + VALUES(pt_sum),
+                        pt_count = pt_count + VALUES(pt_count), conf_sum = conf_sum + VALUES(conf_sum),
+                        conf_count = conf_count + VALUES(conf_count)
+                """, ids)
+                # inspection_defects rows go with them (ON DELETE CASCADE)
+                cursor.execute(f"DELETE FROM inspections WHERE id IN ({placeholders})", ids)
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+        self._stats["batches"] += 1
+        return len(rows)
+
+    def _write_file(self, cursor, rows):
+        """Write the batch file, then index it in the batch's transaction.
+
+        The file is named after the first id: if the transaction fails, the
+        retry selects the same oldest rows and rewrites the same file.
+        """
+        os.makedirs(self.archive_dir, exist_ok=True)
+        first_id = min(row["id"] for row in rows)
+        name = f"inspections-{first_id:010d}.ndjson.gz"
+        path = os.path.join(self.archive_dir, name)
+        tmp_path = path + ".tmp"
+        with gzip.open(tmp_path, "wt", encoding="utf-8") as output:
+            for row in rows:
+                output.write(json.dumps(row, default=_json_default) + "\n")
+        # The rows are deleted from MySQL right after: the file must be on disk first
+        with open(tmp_path, "rb") as written:
+            os.fsync(written.fileno())
+        os.replace(tmp_path, path)
+
+        timestamps = [row["timestamp"] for row in rows if row.get("timestamp")]
+        cursor.execute("""
+            REPLACE INTO archive_files (name, first_id, last_id, min_timestamp, max_timestamp, row_count)
+            VALUES (%s, %s, %s, %s, %s, %s)
+        """, (name, first_id, max(row["id"] for row in rows),
+              min(timestamps, default=None), max(timestamps, default=None), len(rows)))
+
+    def iter_rows(self, since=None, until=None, stations=None):
+        """Archived inspections (both modes) in archive order, filtered by time range and station."""
+        if self.mode == "table":
+            yield from self._iter_table(since, until, stations)
+        else:
+            yield from self._iter_files(since, until, stations)
+
+    def _iter_table(self, since, until, stations):
+        where, params = [], []
+        if since:
+            where.append("timestamp >= %s")
+            params.append(since)
+        if until:
+            where.append("timestamp < %s")
+            params.append(until)
+        if stations:
+            where.append(f"station IN ({', '.join(['%s'] * len(stations))})")
+            params.extend(stations)
+        sql = f"SELECT {', '.join(ARCHIVED_COLUMNS)} FROM inspections_archive"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY timestamp, id"
+        with self._connection() as conn:
+            cursor = conn.cursor(pymysql.cursors.SSDictCursor)
+            try:
+                cursor.execute(sql, params)
+                yield from cursor.fetchall_unbuffered()
+            finally:
+                cursor.close()
+
+    def _iter_files(self, since, until, stations):
+        where, params = [], []
+        if since:
+            where.append("max_timestamp >= %s")
+            params.append(since)
+        if until:
+            where.append("min_timestamp < %s")
+            params.append(until)
+        sql = "SELECT name FROM archive_files"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY first_id"
+        with self._connection() as conn, conn.cursor() as cursor:
+            cursor.execute(sql, params)
+            names = [row["name"] for row in cursor.fetchall()]
+
+        stations = set(stations or ())
+        for name in names:
+            with gzip.open(os.path.join(self.archive_dir, name), "rt", encoding="utf-8") as archive:
+                for line in archive:
+                    row = _decode_file_row(json.loads(line))
+                    if stations and row.get("station") not in stations:
+                        continue
+                    if since and (row["timestamp"] is None or row["timestamp"] < since):
+                        continue
+                    if until and (row["timestamp"] is None or row["timestamp"] >= until):
+                        continue
+                    yield row
+
+    def metrics(self):
+        return dict(self._stats, mode=self.mode, hot_days=self.hot_days)
@@ -1,20 +1,74 @@
-from flask import Flask, request, jsonify
-from flask_socketio import SocketIO, emit
+from flask import Blueprint, Flask, Response, g, request, jsonify, send_file, stream_with_context
+from flask_socketio import SocketIO, emit, join_room, leave_room, rooms
 from flask_cors import CORS
 from datetime import datetime
 import logging
 import pymysql
+import base64
+import functools
 import json
+import os
 import ssl
+import threading
+import time
+
+from alert_engine import AlertEngine
+from archiver import Archiver
+from broadcaster import BroadcastScheduler
+from cache import TTLCache
+from compression import compress_response
+import config
+from db_pool import ConnectionPool
+from idempotency import IdempotencyIndex, PcbIdGenerator, new_key, validate_key
+from images import ImageStore, ImageTooLarge, MIMETYPES, ThumbnailCache, image_name
+from ingest_queue import IngestQueue, QueueFull
+import fastjson
+import migrations
+from rollups import GRANULARITIES, RollupEngine
+from profiler import SamplingProfiler
+from rooms import ALL_ROOM, StationDirectory, is_filter_room, line_room, parse_subscription, station_room
+from scaleout import LeaderElection, socketio_queue_options
+from stats_engine import StatsEngine
+import metrics
 
 #-----------------------------------------------------------
 #Configuration Flask + SocketIO
 # -----------------------------------------------------------
-app = Flask(__name__)
-app.config['SECRET_KEY'] = 'pcb-inspector-secret-key-2024'
-CORS(app, resources={r"/*": {"origins": "*"}})
+SERVER_CONFIG = {
+    # "threading" (werkzeug, dev), "eventlet" or "gevent" (production, via wsgi.py);
+    # wsgi.py monkey-patches before importing this module
+    "async_mode": os.environ.get("ASYNC_MODE", "threading"),
+    "host": os.environ.get("HOST", "0.0.0.0"),
+    "port": int(os.environ.get("PORT", "5000")),
+    "debug": os.environ.get("FLASK_DEBUG", "0") == "1",
+    "stats_broadcast_interval": 30.0,   # seconds between full stats broadcasts
+}
 
-socketio = SocketIO(app, cors_allowed_origins="*", async_mode="threading")
+SCALEOUT_CONFIG = {
+    # Socket.IO fan-out between workers: redis://, amqp://, kafka:// or local:// (in-process
+    # stand-in); None keeps every broadcast in the emitting process (single worker)
+    "message_queue": os.environ.get("SOCKETIO_MESSAGE_QUEUE") or None,
+    "channel": "pcb-inspector",
+    "leader_lock": "pcb_inspector_stats_leader",  # MySQL GET_LOCK name held by the stats leader
+    "leader_retry_interval": 10.0,   # seconds between attempts to take leadership
+    "leader_stats_interval": 5.0,    # with a queue, the leader re-reads and publishes stats this often
+}
+
+JSON_CONFIG = {
+    # defects as a JSON array instead of a JSON-encoded string; the listing
+    # also takes ?defects=native|string per request
+    "native_defects": os.environ.get("NATIVE_DEFECTS", "0") == "1",
+}
+
+COMPRESSION_CONFIG = {
+    "min_size": 1024,       # bytes; smaller bodies are sent as-is
+    "gzip_level": 6,
+    "brotli_quality": 4,    # used when the brotli package is installed
+}
+
+# Routes, hooks and CLI commands hang off this blueprint; create_app() builds the app
+api = Blueprint("api", __name__, cli_group=None)
+socketio = SocketIO()
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -22,48 +76,122 @@ logger = logging.getLogger(__name__)
 # -----------------------------------------------------------
 # Configuration MySQL
 # -----------------------------------------------------------
-import os
+# DB_HOST / DB_USER / DB_PASSWORD / DB_NAME / DB_PORT, see config.py
+DB_CONFIG = config.DB_CONFIG
 
-DB_CONFIG = {
-    "host": "b8rwvnqo0smbmfgxr9ko-mysql.services.clever-cloud.com",
-    "user": "utvn9ejhfssla87g",   # si 1045 persiste, essaie sans suffixe: "dygfagkjzy"
-    "password": "4nQQQQ6MUF1h7IMBGpAo",
-    "database": "b8rwvnqo0smbmfgxr9ko",
-    "port": 3306,
+DB_POOL_CONFIG = {
+    "min_size": 1,
+    "max_size": 10,
+    "acquire_timeout": 10.0,   # seconds a request waits for a free connection
+    "idle_timeout": 300.0,     # idle connections above min_size are closed after this
+    "max_lifetime": 3600.0,    # connections are recycled after this, busy or not
+    "ping_interval": 5.0,      # connections idle longer than this are pinged on checkout
 }
 
-def get_db_connection():
+STATS_CONFIG = {
+    "reconcile_interval": 300.0,  # seconds between full re-reads of the stats aggregate
+}
+
+ROLLUP_CONFIG = {
+    "flush_interval": 5.0,  # seconds between upserts of pending rollup deltas
+}
+
+CACHE_CONFIG = {
+    "operators_ttl": 300.0,     # reference tables, invalidated on POST anyway
+    "stations_ttl": 300.0,
+    "alerts_ttl": 5.0,          # dashboard polls alerts; absorb bursts of polls
+}
+
+METRICS_CONFIG = {
+    # /api/debug/profiler is only served when this token is set (header X-Profiler-Token)
+    "profiler_token": os.environ.get("PROFILER_TOKEN"),
+    "profiler_interval": 0.01,  # seconds between stack samples
+}
+
+ARCHIVE_CONFIG = {
+    "enabled": os.environ.get("ARCHIVE_ENABLED", "0") == "1",
+    "hot_days": int(os.environ.get("ARCHIVE_HOT_DAYS", "30")),  # inspections kept in the hot table
+    "mode": os.environ.get("ARCHIVE_MODE", "table"),  # "table" (inspections_archive) or "files" (NDJSON.gz)
+    "archive_dir": os.environ.get("ARCHIVE_DIR", "archive"),
+    "batch_size": 5000,     # rows moved per transaction
+    "max_batches": 100,     # per run
+    "pause": 0.2,           # seconds between batches
+    "interval": 600.0,      # seconds between runs
+}
+
+IMAGES_CONFIG = {
+    "root": os.environ.get("IMAGE_DIR", "images"),                    # content-addressed originals
+    "thumbnail_root": os.environ.get("THUMBNAIL_DIR", "image-thumbnails"),
+    "max_upload_bytes": 20 * 1024 * 1024,
+    "thumbnail_cache_bytes": 256 * 1024 * 1024,  # LRU-evicted above this
+    "thumbnail_sizes": (128, 256, 512),
+    "default_thumbnail_size": 256,
+    # Prefix for image URLs in API responses, e.g. "http://backend:5000" when the
+    # dashboard is served from another origin; relative URLs by default
+    "public_base_url": os.environ.get("IMAGE_BASE_URL", "").rstrip("/"),
+}
+
+ROOMS_CONFIG = {
+    "stations_ttl": 60.0,   # seconds between re-reads of the station -> line map
+}
+
+ALERTS_CONFIG = {
+    "enabled": True,
+    "window_seconds": 600.0,  # sliding window per station / operator
+    "bucket_seconds": 10.0,   # window granularity
+    "cooldown": 900.0,        # seconds before the same rule can fire again for the same key
+    "baseline_alpha": 0.05,   # EWMA weight of each bucket leaving the window in the long-run means
+}
+
+ALERT_RULES = {
+    "defect_rate": {"threshold": 15.0, "critical": 30.0, "min_samples": 20, "level": "warning"},
+    "confidence_drift": {"drop": 8.0, "min_samples": 20, "level": "warning"},          # points below baseline
+    "processing_time_spike": {"factor": 1.8, "min_samples": 10, "level": "warning"},  # x baseline
+}
+
+BROADCAST_CONFIG = {
+    "window": 0.5,          # at most one stats-update / inspection batch per window (seconds)
+    "stats_delta": True,    # coalesced stats-update carries only the changed counters
+}
+
+def _connect():
+    """Open a raw MySQL connection (used by the pool)"""
+    params = dict(
+        host=DB_CONFIG["host"],
+        user=DB_CONFIG["user"],
+        password=DB_CONFIG["password"],
+        database=DB_CONFIG["database"],
+        port=DB_CONFIG["port"],
+        charset="utf8mb4",
+        use_unicode=True,
+        autocommit=True,
+        cursorclass=metrics.TimedDictCursor
+    )
     try:
-        return pymysql.connect(
-            host=DB_CONFIG["host"],
-            user=DB_CONFIG["user"],
-            password=DB_CONFIG["password"],
-            database=DB_CONFIG["database"],
-            port=DB_CONFIG["port"],
-            charset="utf8mb4",
-            use_unicode=True,
-            cursorclass=pymysql.cursors.DictCursor
-        )
-        
+        return pymysql.connect(**params)
     except pymysql.err.OperationalError as e:
         if e.args[0] == 1049:  # Database doesn't exist
-            logger.info("Database doesn't exist, creating it...")
-            init_database()
-            return pymysql.connect(
-                host=DB_CONFIG["host"],
-                user=DB_CONFIG["user"],
-                password=DB_CONFIG["password"],
-                database=DB_CONFIG["database"],
-                port=DB_CONFIG["port"],
-                charset="utf8mb4",
-                use_unicode=True,
-                cursorclass=pymysql.cursors.DictCursor
-            )
-        else:
-            raise
+            logger.error(f"❌ Database {DB_CONFIG['database']} does not exist (run: flask --app backend migrate)")
+        raise
+
+db_pool = ConnectionPool(_connect, **DB_POOL_CONFIG)
+
+def get_db_connection():
+    """Check out a pooled connection; conn.close() returns it to the pool"""
+    return db_pool.acquire()
+
+def db_connection():
+    """Context manager that always returns the connection to the pool"""
+    return db_pool.connection()
+
+stats_engine = StatsEngine(db_connection, **STATS_CONFIG)
+archiver = Archiver(db_connection, sleep=socketio.sleep,
+                    **{k: v for k, v in ARCHIVE_CONFIG.items() if k not in ("enabled", "interval")})
+rollup_engine = RollupEngine(db_connection, start_task=socketio.start_background_task,
+                             sleep=socketio.sleep, **ROLLUP_CONFIG)
 
 def init_database():
-    """Initialize database and tables with additional fields"""
+    """Create the database if needed and apply pending schema migrations"""
     conn = pymysql.connect(
         host=DB_CONFIG["host"],
         user=DB_CONFIG["user"],
@@ -73,129 +201,546 @@ def init_database():
         use_unicode=True,
         cursorclass=pymysql.cursors.DictCursor
     )
-    
-    with conn.cursor() as cursor:
-        # Create database
-        cursor.execute("CREATE DATABASE IF NOT EXISTS b8rwvnqo0smbmfgxr9ko")
-        cursor.execute("USE b8rwvnqo0smbmfgxr9ko")
-        
-        # Drop and recreate inspections table with all required fields
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS inspections (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                pcb_id VARCHAR(50),
-                status ENUM('passed','failed') NOT NULL,
-                defects JSON,
-                operator VARCHAR(100),
-                station VARCHAR(100),
-                components TEXT,
-                microbe_count INT DEFAULT 0,
-                image_path VARCHAR(255),
-                confidence FLOAT DEFAULT 0.0,
-                processing_time FLOAT DEFAULT 0.0,
-                timestamp DATETIME,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
-            )
-        """)
-        
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS alerts (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                message TEXT,
-                level VARCHAR(20),
-                ack BOOLEAN DEFAULT FALSE,
-                created_at DATETIME
-            )
-        """)
-        
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS operators (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                name VARCHAR(100) NOT NULL,
-                shift VARCHAR(50) NOT NULL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-        
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS stations (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                name VARCHAR(100) NOT NULL,
-                line VARCHAR(50) NOT NULL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-        
-        conn.commit()
-        logger.info("✅ Database and tables created successfully with enhanced schema")
-    
-    conn.close()
-
-# -----------------------------------------------------------
-# Fonctions utilitaires
-# -----------------------------------------------------------
-def get_stats():
     try:
-        conn = get_db_connection()
         with conn.cursor() as cursor:
-            cursor.execute("SELECT COUNT(*) AS total FROM inspections")
-            total = cursor.fetchone()["total"]
+            cursor.execute(f"CREATE DATABASE IF NOT EXISTS `{DB_CONFIG['database']}`")
+            cursor.execute(f"USE `{DB_CONFIG['database']}`")
+        applied = migrations.migrate(conn)
+        logger.info(f"✅ Database schema at version {migrations.LATEST_VERSION} (applied: {applied or 'none'})")
+        return applied
+    finally:
+        conn.close()
 
-            cursor.execute("SELECT COUNT(*) AS passed FROM inspections WHERE status='passed'")
-            passed = cursor.fetchone()["passed"]
+def check_schema():
+    """Startup check: the schema must be at the version this code expects (no DDL here)"""
+    with db_connection() as conn:
+        return migrations.check(conn)
 
-            cursor.execute("SELECT COUNT(*) AS failed FROM inspections WHERE status='failed'")
-            failed = cursor.fetchone()["failed"]
-            
-            # Additional stats
-            cursor.execute("SELECT AVG(processing_time) AS avg_processing_time FROM inspections WHERE processing_time > 0")
-            avg_time_result = cursor.fetchone()
-            avg_processing_time = avg_time_result["avg_processing_time"] or 2.1
-            
-            cursor.execute("SELECT AVG(confidence) AS avg_confidence FROM inspections WHERE confidence > 0")
-            confidence_result = cursor.fetchone()
-            avg_confidence = confidence_result["avg_confidence"] or 95.0
+@api.cli.command("migrate")
+def migrate_command():
+    """Create the database if needed and apply pending schema migrations."""
+    applied = init_database()
+    print(f"Applied migrations: {applied}" if applied else "Schema already up to date")
 
-        conn.close()
-        
-        defect_rate = (failed / total * 100) if total > 0 else 0
-        efficiency = (passed / total * 100) if total > 0 else 100
-        
-        return {
-            "total": total,
-            "passed": passed, 
-            "failed": failed,
-            "defect_rate": round(defect_rate, 2),
-            # Additional metrics for frontend compatibility
-            "totalInspections": total,
-            "conformeCount": passed,
-            "nonConformeCount": failed,
-            "avgProcessingTime": round(avg_processing_time, 2),
-            "efficiency": round(efficiency, 1),
-            "uptime": 98.5,  # Static for now
-            "avgConfidence": round(avg_confidence, 1)
-        }
+# -----------------------------------------------------------
+# Fonctions utilitaires
+# -----------------------------------------------------------
+def get_stats(stations=None):
+    try:
+        return stats_engine.snapshot(stations)
     except Exception as e:
         logger.error(f"Error getting stats: {e}")
         return {"total": 0, "passed": 0, "failed": 0, "defect_rate": 0, "totalInspections": 0, "conformeCount": 0, "nonConformeCount": 0, "avgProcessingTime": 2.1, "efficiency": 100, "uptime": 98.5}
 
+def _observe_emit(event, duration):
+    metrics.socketio_emits.inc(event=event)
+    metrics.socketio_fanout_duration.observe(duration, event=event)
+
+station_directory = StationDirectory(db_connection, ttl=ROOMS_CONFIG["stations_ttl"])
+
+def active_rooms():
+    """Station/line rooms that currently have subscribers.
+
+    With a message queue the subscribers may sit in another worker, so
+    every known room is considered active.
+    """
+    if SCALEOUT_CONFIG["message_queue"]:
+        return station_directory.all_rooms()
+    return [room for room in list(socketio.server.manager.rooms.get("/", {})) if is_filter_room(room)]
+
+def get_room_stats():
+    return {room: get_stats(station_directory.stations_for(room)) for room in active_rooms()}
+
+# With several workers each one only counts its own inserts, so per-insert stats
+# deltas would disagree; the elected leader publishes the stats instead.
+broadcaster = BroadcastScheduler(socketio, get_stats, on_emit=_observe_emit,
+                                 stats_on_insert=not SCALEOUT_CONFIG["message_queue"],
+                                 default_room=ALL_ROOM, room_of=station_directory.rooms_for,
+                                 room_stats=get_room_stats, **BROADCAST_CONFIG)
+def publish_alerts(alerts):
+    """Called by the alert engine once its alerts are written"""
+    response_cache.invalidate("alerts")
+    for alert in alerts:
+        to = [ALL_ROOM]
+        if alert["dimension"] == "station":
+            to.extend(station_directory.rooms_for({"station": alert["value"]}))
+        broadcaster.send_alert(alert, to=to)
+
+alert_engine = AlertEngine(db_connection, ALERT_RULES, window_seconds=ALERTS_CONFIG["window_seconds"],
+                           bucket_seconds=ALERTS_CONFIG["bucket_seconds"], cooldown=ALERTS_CONFIG["cooldown"],
+                           baseline_alpha=ALERTS_CONFIG["baseline_alpha"], on_alerts=publish_alerts,
+                           start_task=socketio.start_background_task)
+leader = LeaderElection(_connect, SCALEOUT_CONFIG["leader_lock"],
+                        retry_interval=SCALEOUT_CONFIG["leader_retry_interval"])
+
+INSPECTION_COLUMNS = (
+    "pcb_id", "status", "defects", "operator", "station", "components",
+    "microbe_count", "image_path", "confidence", "processing_time", "timestamp", "idempotency_key",
+)
+INSERT_INSPECTION_SQL = (
+    f"INSERT INTO inspections ({', '.join(INSPECTION_COLUMNS)}) VALUES "
+)
+INSPECTION_PLACEHOLDERS = "(" + ", ".join(["%s"] * len(INSPECTION_COLUMNS)) + ")"
+
+INGEST_CONFIG = {
+    "write_behind": False,      # queue inspections and answer 202 instead of writing inline
+    "max_queue": 10000,         # queued inspections before POSTs get 429
+    "batch_size": 500,          # inspections per background transaction
+    "flush_interval": 0.2,      # seconds to let a partial batch fill up
+    "journal_path": os.environ.get("INGEST_JOURNAL") or None,  # e.g. "ingest-journal.ndjson" to survive restarts
+    "fsync": False,             # fsync the journal on every accepted request
+}
+
+BULK_CONFIG = {
+    "max_items": 5000,      # items accepted per bulk request
+    "chunk_size": 500,      # rows per multi-row INSERT statement
+}
+
+IDEMPOTENCY_CONFIG = {
+    "max_entries": 50000,   # recent keys answered from memory; older retries hit the unique index
+}
+
+ER_DUP_ENTRY = 1062
+
+idempotency_index = IdempotencyIndex(IDEMPOTENCY_CONFIG["max_entries"])
+next_pcb_id = PcbIdGenerator()
+
+def _number(data, key, default, cast):
+    value = data.get(key, default)
+    try:
+        return cast(value) if value is not None else cast(default)
+    except (TypeError, ValueError):
+        raise ValueError(f"invalid {key}: {value!r}")
+
+def normalize_inspection(data, idempotency_key=None):
+    """Validate an incoming inspection and return its column values"""
+    if not isinstance(data, dict):
+        raise ValueError("inspection must be a JSON object")
+    idempotency_key = validate_key(idempotency_key or data.get("idempotency_key"))
+    status = data.get("status", "failed")
+    if status not in ("passed", "failed"):
+        raise ValueError(f"invalid status: {status!r}")
+
+    # Parse defects if they're a list
+    defects_json = data.get("defects", [])
+    if isinstance(defects_json, list):
+        defects_json = json.dumps(defects_json)
+    elif isinstance(defects_json, str) and defects_json.strip().startswith('['):
+        # Already JSON string
+        pass
+    else:
+        # Convert string to proper JSON format
+        defects_json = json.dumps([{"type": defects_json, "severity": "Mineur"}] if defects_json else [])
+
+    return {
+        "pcb_id": data.get("pcb_id") or next_pcb_id(),
+        "status": status,
+        "defects": defects_json,
+        "operator": data.get("operator", "unknown"),
+        "station": data.get("station", "line-1"),
+        "components": data.get("components", ""),
+        "microbe_count": _number(data, "microbe_count", 0, int),
+        "image_path": data.get("image_path", ""),
+        "confidence": _number(data, "confidence", 0.0, float),
+        "processing_time": _number(data, "processing_time", 2.1, float),
+        # DATETIME has no fractional part; keep what the row will hold
+        "timestamp": datetime.now().replace(microsecond=0),
+        "idempotency_key": idempotency_key,
+    }
+
+image_store = ImageStore(IMAGES_CONFIG["root"], max_upload_bytes=IMAGES_CONFIG["max_upload_bytes"])
+thumbnails = ThumbnailCache(image_store, IMAGES_CONFIG["thumbnail_root"],
+                            max_bytes=IMAGES_CONFIG["thumbnail_cache_bytes"], sizes=IMAGES_CONFIG["thumbnail_sizes"])
+
+def image_urls(image_path):
+    """(image URL, thumbnail URL) for a stored image; other paths are passed through unchanged"""
+    name = image_name(image_path)
+    if name is None:
+        return image_path or "", None
+    url = f"{IMAGES_CONFIG['public_base_url']}/api/images/{name}"
+    return url, f"{url}/thumbnail?size={IMAGES_CONFIG['default_thumbnail_size']}"
+
+def format_inspection(row, native_defects=None):
+    """Serialize an inspection row (DB row or normalized values + id) for the API"""
+    defects = row.get("defects")
+    if JSON_CONFIG["native_defects"] if native_defects is None else native_defects:
+        defects = fastjson.loads(defects) if isinstance(defects, str) and defects else defects or []
+    elif not isinstance(defects, str):
+        defects = json.dumps(defects) if defects else "[]"
+    image_url, thumbnail_url = image_urls(row.get("image_path"))
+    return {
+        "id": row["id"],
+        "pcb_id": row.get("pcb_id"),
+        "status": row.get("status"),
+        "defects": defects,
+        "operator": row.get("operator"),
+        "station": row.get("station"),
+        "timestamp": row["timestamp"].isoformat() if row.get("timestamp") else datetime.now().isoformat(),
+        "components": row.get("components", ""),
+        "microbe_count": row.get("microbe_count", 0),
+        "confidence": row.get("confidence", 0.0),
+        "processing_time": row.get("processing_time", 0.0),
+        "image_path": image_url,
+        "thumbnail_url": thumbnail_url,
+    }
+
+INSPECTION_FIELDS = (
+    "id", "pcb_id", "status", "defects", "operator", "station", "timestamp",
+    "components", "microbe_count", "confidence", "processing_time", "image_path",
+)
+
+LISTING_CONFIG = {
+    "default_limit": 100,
+    "max_limit": 1000,          # per page for the JSON listing
+    "max_export": 1000000,      # rows per streamed export
+    "stream_batch": 500,        # rows fetched per round trip while streaming
+}
+
+def encode_cursor(row):
+    raw = f"{row['timestamp'].isoformat()}|{row['id']}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def decode_cursor(token):
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)).decode()
+        timestamp, inspection_id = raw.rsplit("|", 1)
+        return datetime.fromisoformat(timestamp), int(inspection_id)
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError("invalid cursor")
+
+def _parse_time(args, key):
+    value = args.get(key)
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value.replace("Z", "+00:00")).replace(tzinfo=None)
+    except ValueError:
+        raise ValueError(f"invalid {key}: {value!r}")
+
+def build_inspection_query(args, streaming=False):
+    """Translate listing query args into (sql, params, limit, fields)"""
+    where, params = [], []
+    for column in ("station", "operator", "status"):
+        values = [v for v in args.get(column, "").split(",") if v]
+        if len(values) == 1:
+            where.append(f"{column} = %s")
+            params.append(values[0])
+        elif values:
+            where.append(f"{column} IN ({', '.join(['%s'] * len(values))})")
+            params.extend(values)
+
+    defect_types = [v for v in args.get("defect_type", "").split(",") if v]
+    if defect_types:
+        # Semi-join on idx_inspection_defects_type instead of parsing the JSON column
+        where.append(f"""id IN (SELECT inspection_id FROM inspection_defects
+                              WHERE defect_type IN ({', '.join(['%s'] * len(defect_types))}))""")
+        params.extend(defect_types)
+
+    since, until = _parse_time(args, "since"), _parse_time(args, "until")
+    if since:
+        where.append("timestamp >= %s")
+        params.append(since)
+    if until:
+        where.append("timestamp < %s")
+        params.append(until)
+
+    if args.get("cursor"):
+        timestamp, inspection_id = decode_cursor(args["cursor"])
+        where.append("(timestamp < %s OR (timestamp = %s AND id < %s))")
+        params.extend([timestamp, timestamp, inspection_id])
+
+    max_limit = LISTING_CONFIG["max_export"] if streaming else LISTING_CONFIG["max_limit"]
+    try:
+        limit = int(args.get("limit", max_limit if streaming else LISTING_CONFIG["default_limit"]))
+    except ValueError:
+        raise ValueError("invalid limit")
+    limit = max(1, min(limit, max_limit))
+
+    fields = [f for f in args.get("fields", "").split(",") if f]
+    unknown = set(fields) - set(INSPECTION_FIELDS)
+    if unknown:
+        raise ValueError(f"unknown fields: {', '.join(sorted(unknown))}")
+    # id and timestamp are always read: the next cursor is built from them
+    columns = sorted(set(fields) | {"id", "timestamp"}, key=INSPECTION_FIELDS.index) if fields else INSPECTION_FIELDS
+
+    sql = f"SELECT {', '.join(columns)} FROM inspections"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    sql += " ORDER BY timestamp DESC, id DESC LIMIT %s"
+    params.append(limit)
+    return sql, params, limit, fields
+
+def native_defects_requested(args):
+    value = args.get("defects")
+    if value is None:
+        return JSON_CONFIG["native_defects"]
+    if value not in ("native", "string"):
+        raise ValueError(f"invalid defects: {value!r} (native or string)")
+    return value == "native"
+
+def project_inspection(row, fields, native_defects=None):
+    inspection = format_inspection(row, native_defects)
+    return {f: inspection[f] for f in fields} if fields else inspection
+
+def _stream_inspections(sql, params, fields, ndjson, native_defects=None):
+    """Yield rows from an unbuffered cursor as NDJSON lines or a JSON array"""
+    conn = db_pool.acquire()
+    completed = False
+    try:
+        cursor = conn.cursor(metrics.TimedSSDictCursor)
+        cursor.execute(sql, params)
+        if not ndjson:
+            yield b'{"inspections": ['
+        first = True
+        while True:
+            rows = cursor.fetchmany(LISTING_CONFIG["stream_batch"])
+            if not rows:
+                break
+            chunk = []
+            for row in rows:
+                line = fastjson.dumps_bytes(project_inspection(row, fields, native_defects))
+                if ndjson:
+                    chunk.append(line + b"\n")
+                else:
+                    chunk.append(line if first else b"," + line)
+                    first = False
+            yield b"".join(chunk)
+        if not ndjson:
+            yield b"]}"
+        cursor.close()
+        completed = True
+    finally:
+        # An abandoned unbuffered result would have to be drained before the
+        # connection is reusable; dropping the connection is cheaper.
+        conn.close(discard=not completed)
+
+_autoinc_step = None
+
+def insert_inspections(cursor, rows, chunk_size=None):
+    """Insert normalized rows with multi-row INSERTs and return their ids in order.
+
+    Must run inside a transaction. InnoDB hands a multi-row INSERT a
+    consecutive auto-increment block, so the ids are derived from
+    lastrowid (the first id) and @@auto_increment_increment.
+    """
+    global _autoinc_step
+    if _autoinc_step is None:
+        cursor.execute("SELECT @@auto_increment_increment AS step")
+        _autoinc_step = int(cursor.fetchone()["step"] or 1)
+
+    chunk_size = chunk_size or BULK_CONFIG["chunk_size"]
+    ids = []
+    for start in range(0, len(rows), chunk_size):
+        chunk = rows[start:start + chunk_size]
+        params = [row[column] for row in chunk for column in INSPECTION_COLUMNS]
+        cursor.execute(INSERT_INSPECTION_SQL + ", ".join([INSPECTION_PLACEHOLDERS] * len(chunk)), params)
+        first_id = cursor.lastrowid
+        chunk_ids = [first_id + i * _autoinc_step for i in range(len(chunk))]
+        # Normalized copy of the defects JSON, queried through its index
+        defects = migrations.defect_rows(dict(row, id=inspection_id) for row, inspection_id in zip(chunk, chunk_ids))
+        if defects:
+            cursor.executemany(migrations.INSERT_DEFECTS_SQL, defects)
+        ids.extend(chunk_ids)
+    return ids
+
+def find_inspections_by_key(cursor, keys):
+    """{idempotency_key: row} for the keys already in the inspections table"""
+    if not keys:
+        return {}
+    cursor.execute(f"SELECT * FROM inspections WHERE idempotency_key IN ({', '.join(['%s'] * len(keys))})",
+                   list(keys))
+    return {row["idempotency_key"]: row for row in cursor.fetchall()}
+
+def write_inspection_batch(rows):
+    """Insert normalized rows in one transaction, then update stats and broadcast.
+
+    Rows whose idempotency key is already in the table (a client retry, a
+    journal replayed after a crash) or earlier in the batch are not written
+    again. Returns [(inspection, replayed)] in input order.
+    """
+    keys = {row["idempotency_key"] for row in rows if row.get("idempotency_key")}
+    for attempt in range(2):
+        with db_connection() as conn, conn.cursor() as cursor:
+            conn.begin()
+            try:
+                existing = find_inspections_by_key(cursor, keys)
+                seen = set(existing)
+                fresh = []  # indexes of the rows to insert
+                for index, row in enumerate(rows):
+                    key = row.get("idempotency_key")
+                    if key in seen:
+                        continue
+                    if key:
+                        seen.add(key)
+                    fresh.append(index)
+                ids = insert_inspections(cursor, [rows[index] for index in fresh]) if fresh else []
+                conn.commit()
+                break
+            except pymysql.err.IntegrityError as e:
+                conn.rollback()
+                # A concurrent request inserted one of the keys first: the next lookup sees it
+                if attempt or e.args[0] != ER_DUP_ENTRY:
+                    raise
+            except Exception:
+                conn.rollback()
+                raise
+
+    inserted = after_insert([dict(rows[index], id=inspection_id) for index, inspection_id in zip(fresh, ids)])
+    results = [None] * len(rows)
+    by_key = {}
+    for index, inspection in zip(fresh, inserted):
+        results[index] = (inspection, False)
+        if rows[index].get("idempotency_key"):
+            by_key[rows[index]["idempotency_key"]] = inspection
+    for key, row in existing.items():
+        by_key[key] = format_inspection(row)
+        idempotency_index.put(key, by_key[key])
+    for index, row in enumerate(rows):
+        if results[index] is None:
+            results[index] = (by_key[row["idempotency_key"]], True)
+    return results
+
+def after_insert(rows):
+    """Feed freshly inserted rows (values + id) to stats, rollups, alert rules and broadcasts"""
+    inserted = [format_inspection(row) for row in rows]
+    for row, inspection in zip(rows, inserted):
+        if row.get("idempotency_key"):
+            idempotency_index.put(row["idempotency_key"], inspection)
+    stats_engine.record_many(rows)
+    rollup_engine.record_many(rows)
+    if ALERTS_CONFIG["enabled"]:
+        alert_engine.observe_many(rows)
+    broadcaster.queue_inspections(inserted)
+    return inserted
+
+def _decode_journaled_inspection(item):
+    # Items journaled before idempotency keys existed have none
+    return dict(item, timestamp=datetime.fromisoformat(item["timestamp"]),
+                idempotency_key=item.get("idempotency_key"))
+
+ingest_queue = IngestQueue(
+    write_inspection_batch,
+    max_size=INGEST_CONFIG["max_queue"],
+    batch_size=INGEST_CONFIG["batch_size"],
+    flush_interval=INGEST_CONFIG["flush_interval"],
+    journal_path=INGEST_CONFIG["journal_path"],
+    fsync=INGEST_CONFIG["fsync"],
+    decode=_decode_journaled_inspection,
+    start_task=socketio.start_background_task,
+    sleep=socketio.sleep,
+)
+
+def _queue_full_response(e):
+    response = jsonify({"error": "Ingest queue full, retry later", "retry_after": e.retry_after})
+    response.status_code = 429
+    response.headers["Retry-After"] = str(e.retry_after)
+    return response
+
+def _replayed_response(result):
+    """Answer a retried request with what the original one got"""
+    if result.get("queued"):
+        response = jsonify({"success": True, "queued": True, "pcb_id": result["pcb_id"]})
+        response.status_code = 202
+    else:
+        response = jsonify({"success": True, "inspection": result})
+    response.headers["Idempotent-Replayed"] = "true"
+    return response
+
+def submit_queued(values_list):
+    """Queue normalized rows for the write-behind writer; every row leaves with a key"""
+    for values in values_list:
+        if values["idempotency_key"]:
+            idempotency_index.put(values["idempotency_key"], {"queued": True, "pcb_id": values["pcb_id"]})
+        else:
+            values["idempotency_key"] = new_key()
+    ingest_queue.submit_many(values_list)
+
 def broadcast_stats():
-    """Broadcast updated stats to all connected clients"""
-    stats_data = get_stats()
-    socketio.emit("stats-update", {"type": "stats-update", "data": stats_data})
+    """Broadcast full stats to all connected clients"""
+    stats_data = broadcaster.send_full_stats()
     logger.info(f"📊 Stats broadcasted: {stats_data['total']} total inspections")
 
-def broadcast_new_inspection(inspection):
-    """Broadcast new inspection to all connected clients"""
-    socketio.emit("new-inspection", {"type": "new-inspection", "data": inspection})
-    logger.info(f"📡 New inspection broadcasted: {inspection.get('pcb_id', 'N/A')}")
+# -----------------------------------------------------------
+# Instrumentation
+# -----------------------------------------------------------
+profiler = SamplingProfiler(interval=METRICS_CONFIG["profiler_interval"])
+
+@api.before_app_request
+def _start_request_timer():
+    g.request_started = time.perf_counter()
+
+@api.after_app_request
+def _observe_request(response):
+    started = g.pop("request_started", None)
+    if started is not None:
+        endpoint = request.url_rule.rule if request.url_rule else "unmatched"
+        metrics.http_request_duration.observe(time.perf_counter() - started,
+                                              method=request.method, endpoint=endpoint)
+        metrics.http_requests.inc(method=request.method, endpoint=endpoint, status=response.status_code)
+    return response
+
+# Registered after _observe_request so it runs first and its cost shows in the latency
+@api.after_app_request
+def _compress_response(response):
+    return compress_response(response, request.headers.get("Accept-Encoding"), **COMPRESSION_CONFIG)
+
+def timed_socket_handler(event):
+    """Record Socket.IO handler latency under the event name"""
+    def decorator(handler):
+        @functools.wraps(handler)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return handler(*args, **kwargs)
+            finally:
+                metrics.socketio_handler_duration.observe(time.perf_counter() - started, event=event)
+        return wrapper
+    return decorator
+
+metrics.registry.gauge("pcb_db_pool_connections", "Pooled MySQL connections by state",
+                       lambda: {k: v for k, v in db_pool.metrics().items() if k in ("in_use", "idle")},
+                       ("state",))
+metrics.registry.gauge("pcb_db_pool_events", "Pool lifetime counters (created, recycled, waits, timeouts)",
+                       lambda: {k: v for k, v in db_pool.metrics().items()
+                                if k in ("created", "recycled", "checkouts", "waits", "timeouts", "health_check_failures")},
+                       ("event",))
+metrics.registry.gauge("pcb_db_pool_wait_seconds", "Total time spent waiting for a pooled connection",
+                       lambda: db_pool.metrics()["wait_time_total"])
+metrics.registry.gauge("pcb_cache_lookups", "Reference data cache lookups by result",
+                       lambda: {"hit": response_cache.hits, "miss": response_cache.misses}, ("result",))
+metrics.registry.gauge("pcb_ingest_queue_depth", "Inspections waiting in the write-behind queue",
+                       lambda: ingest_queue.metrics()["queued"] if INGEST_CONFIG["write_behind"] else None)
+
+@api.route("/metrics")
+def prometheus_metrics():
+    return Response(metrics.registry.render(), mimetype="text/plain; version=0.0.4")
+
+@api.route("/api/debug/profiler", methods=["GET", "POST"])
+def api_profiler():
+    """Toggle the sampling profiler; GET ?format=collapsed returns flame-graph stacks"""
+    token = METRICS_CONFIG["profiler_token"]
+    if not token or request.headers.get("X-Profiler-Token") != token:
+        return jsonify({"error": "Not found"}), 404
+
+    if request.method == "POST":
+        data = request.get_json(silent=True) or {}
+        if data.get("enabled"):
+            profiler.start(interval=data.get("interval"), reset=data.get("reset", True))
+            logger.info("🔬 Sampling profiler started")
+        else:
+            profiler.stop()
+            logger.info("🔬 Sampling profiler stopped")
+        return jsonify(profiler.status())
+
+    if request.args.get("format") == "collapsed":
+        return Response(profiler.collapsed(), mimetype="text/plain")
+    return jsonify(profiler.status())
 
 # -----------------------------------------------------------
 # Routes API
 # -----------------------------------------------------------
 
-@app.route("/")
+@api.route("/")
 def root():
     return jsonify({
         "message": "PCB Inspector Backend API (Flask + MySQL)",
@@ -209,8 +754,14 @@ def root():
         },
         "endpoints": {
             "stats": "/api/stats",
+            "stats-timeseries": "/api/stats/timeseries",
+            "stats-by-station": "/api/stats/by-station",
+            "stats-by-operator": "/api/stats/by-operator",
             "inspections": "/api/inspections",
             "inspection-result": "/api/inspection-result",
+            "inspections-bulk": "/api/inspections/bulk",
+            "archive-export": "/api/archive/export",
+            "images": "/api/images",
             "alerts": "/api/alerts",
             "ai-chat": "/api/ai-chat",
             "complaints": "/api/complaints",
@@ -220,42 +771,33 @@ def root():
     })
 
 # ---- Inspections ----
-@app.route("/api/inspections", methods=["GET", "POST"])
+@api.route("/api/inspections", methods=["GET", "POST"])
 def api_inspections():
     if request.method == "GET":
+        export = request.args.get("format")
+        streaming = export in ("ndjson", "stream")
+        try:
+            sql, params, limit, fields = build_inspection_query(request.args, streaming=streaming)
+            native_defects = native_defects_requested(request.args)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
+        if streaming:
+            ndjson = export == "ndjson"
+            return Response(
+                stream_with_context(_stream_inspections(sql, params, fields, ndjson, native_defects)),
+                mimetype="application/x-ndjson" if ndjson else "application/json",
+            )
+
         try:
-            conn = get_db_connection()
-            with conn.cursor() as cursor:
-                cursor.execute("""
-                    SELECT id, pcb_id, status, defects, operator, station, 
-                           components, microbe_count, image_path, confidence, 
-                           processing_time, timestamp 
-                    FROM inspections 
-                    ORDER BY timestamp DESC 
-                    LIMIT 100
-                """)
+            with db_connection() as conn, conn.cursor() as cursor:
+                cursor.execute(sql, params)
                 inspections = cursor.fetchall()
-                
-                # Format data for frontend
-                formatted_inspections = []
-                for inspection in inspections:
-                    formatted_inspection = {
-                        "id": inspection["id"],
-                        "pcb_id": inspection["pcb_id"],
-                        "status": inspection["status"],
-                        "defects": inspection["defects"] if isinstance(inspection["defects"], str) else json.dumps(inspection["defects"]) if inspection["defects"] else "[]",
-                        "operator": inspection["operator"],
-                        "station": inspection["station"],
-                        "timestamp": inspection["timestamp"].isoformat() if inspection["timestamp"] else datetime.now().isoformat(),
-                        "components": inspection.get("components", ""),
-                        "microbe_count": inspection.get("microbe_count", 0),
-                        "confidence": inspection.get("confidence", 0.0),
-                        "processing_time": inspection.get("processing_time", 0.0)
-                    }
-                    formatted_inspections.append(formatted_inspection)
-                
-            conn.close()
-            return jsonify({"inspections": formatted_inspections})
+
+            # Format data for frontend
+            formatted_inspections = [project_inspection(inspection, fields, native_defects) for inspection in inspections]
+            next_cursor = encode_cursor(inspections[-1]) if len(inspections) == limit else None
+            return jsonify({"inspections": formatted_inspections, "next_cursor": next_cursor})
         except Exception as e:
             logger.error(f"Error getting inspections: {e}")
             return jsonify({"inspections": []})
@@ -266,72 +808,51 @@ def api_inspections():
             return jsonify({"error": "Missing data"}), 400
 
         try:
-            conn = get_db_connection()
-            with conn.cursor() as cursor:
-                # Parse defects if they're a list
-                defects_json = data.get("defects", [])
-                if isinstance(defects_json, list):
-                    defects_json = json.dumps(defects_json)
-                elif isinstance(defects_json, str) and defects_json.strip().startswith('['):
-                    # Already JSON string
-                    pass
-                else:
-                    # Convert string to proper JSON format
-                    defects_json = json.dumps([{"type": defects_json, "severity": "Mineur"}] if defects_json else [])
-                
-                sql = """
-                    INSERT INTO inspections 
-                    (pcb_id, status, defects, operator, station, components, 
-                     microbe_count, image_path, confidence, processing_time, timestamp)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                """
-                
-                cursor.execute(sql, (
-                    data.get("pcb_id", f"PCB-{int(datetime.now().timestamp())}"),
-                    data.get("status", "failed"),
-                    defects_json,
-                    data.get("operator", "unknown"),
-                    data.get("station", "line-1"),
-                    data.get("components", ""),
-                    data.get("microbe_count", 0),
-                    data.get("image_path", ""),
-                    data.get("confidence", 0.0),
-                    data.get("processing_time", 2.1),
-                    datetime.now()
-                ))
-                conn.commit()
-                inspection_id = cursor.lastrowid
-
-                # Get the inserted inspection
-                cursor.execute("""
-                    SELECT id, pcb_id, status, defects, operator, station, 
-                           components, microbe_count, image_path, confidence, 
-                           processing_time, timestamp 
-                    FROM inspections WHERE id=%s
-                """, (inspection_id,))
-                inspection = cursor.fetchone()
-                
-                # Format for response
-                if inspection:
-                    formatted_inspection = {
-                        "id": inspection["id"],
-                        "pcb_id": inspection["pcb_id"],
-                        "status": inspection["status"],
-                        "defects": inspection["defects"],
-                        "operator": inspection["operator"],
-                        "station": inspection["station"],
-                        "timestamp": inspection["timestamp"].isoformat(),
-                        "components": inspection.get("components", ""),
-                        "microbe_count": inspection.get("microbe_count", 0),
-                        "confidence": inspection.get("confidence", 0.0),
-                        "processing_time": inspection.get("processing_time", 0.0)
-                    }
-                
-            conn.close()
-
-            # Broadcast to connected clients (Next.js dashboard)
-            broadcast_new_inspection(formatted_inspection)
-            broadcast_stats()
+            values = normalize_inspection(data, request.headers.get("Idempotency-Key"))
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
+        key = values["idempotency_key"]
+        if key:
+            replayed = idempotency_index.get(key)
+            if replayed is not None:
+                return _replayed_response(replayed)
+
+        if INGEST_CONFIG["write_behind"]:
+            try:
+                submit_queued([values])
+            except QueueFull as e:
+                return _queue_full_response(e)
+            return jsonify({"success": True, "queued": True, "pcb_id": values["pcb_id"]}), 202
+
+        try:
+            with db_connection() as conn, conn.cursor() as cursor:
+                try:
+                    if values["defects"] == "[]":
+                        # Pooled connections run in autocommit mode: the INSERT is the only round trip
+                        cursor.execute(INSERT_INSPECTION_SQL + INSPECTION_PLACEHOLDERS,
+                                       [values[column] for column in INSPECTION_COLUMNS])
+                        inspection_id = cursor.lastrowid
+                    else:
+                        # The inspection and its inspection_defects rows commit together
+                        conn.begin()
+                        try:
+                            inspection_id = insert_inspections(cursor, [values])[0]
+                            conn.commit()
+                        except Exception:
+                            conn.rollback()
+                            raise
+                except pymysql.err.IntegrityError as e:
+                    # Retry of a request this worker no longer remembers (or another worker handled)
+                    if not key or e.args[0] != ER_DUP_ENTRY:
+                        raise
+                    original = format_inspection(find_inspections_by_key(cursor, [key])[key])
+                    idempotency_index.put(key, original)
+                    return _replayed_response(original)
+
+            # Build the response from what was written instead of reading it back;
+            # broadcasts to the Next.js dashboard go out after the response
+            formatted_inspection = after_insert([dict(values, id=inspection_id)])[0]
             
             logger.info(f"✅ New inspection saved: {formatted_inspection['pcb_id']} - Status: {formatted_inspection['status']}")
             
@@ -341,32 +862,297 @@ def api_inspections():
             logger.error(f"Error saving inspection: {e}")
             return jsonify({"error": f"Failed to save inspection: {str(e)}"}), 500
 
+# ---- Bulk ingest ----
+def _read_bulk_items():
+    """Parse a bulk body: JSON array, {"inspections": [...]} or NDJSON"""
+    if request.mimetype in ("application/x-ndjson", "application/jsonl", "application/ndjson"):
+        items = []
+        for line in request.stream:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                items.append(fastjson.loads(line))
+            except ValueError as e:
+                items.append(ValueError(f"invalid JSON line: {e}"))
+        return items
+
+    data = request.get_json(silent=True)
+    if isinstance(data, dict):
+        data = data.get("inspections")
+    if not isinstance(data, list):
+        raise ValueError("expected a JSON array of inspections or an NDJSON body")
+    return data
+
+@api.route("/api/inspections/bulk", methods=["POST"])
+def api_inspections_bulk():
+    """Insert many inspections in one transaction with multi-row INSERTs"""
+    try:
+        items = _read_bulk_items()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    if not items:
+        return jsonify({"error": "Missing data"}), 400
+    if len(items) > BULK_CONFIG["max_items"]:
+        return jsonify({"error": f"Too many items (max {BULK_CONFIG['max_items']})"}), 413
+
+    results = [None] * len(items)
+    valid = []  # (index, values)
+    replayed = 0
+    for index, item in enumerate(items):
+        try:
+            if isinstance(item, Exception):
+                raise item
+            values = normalize_inspection(item)
+        except ValueError as e:
+            results[index] = {"index": index, "error": str(e)}
+            continue
+        # Items sent (and answered) before are not written again
+        previous = idempotency_index.get(values["idempotency_key"]) if values["idempotency_key"] else None
+        if previous is None:
+            valid.append((index, values))
+            continue
+        replayed += 1
+        if previous.get("queued"):
+            results[index] = {"index": index, "queued": True, "pcb_id": previous["pcb_id"], "replayed": True}
+        else:
+            results[index] = {"index": index, "id": previous["id"], "pcb_id": previous["pcb_id"], "replayed": True}
+
+    failed = len(items) - len(valid) - replayed
+    if not valid and not replayed:
+        return jsonify({"success": False, "inserted": 0, "failed": failed, "results": results}), 400
+
+    if INGEST_CONFIG["write_behind"]:
+        # Keys repeated within the request are queued once
+        queued, seen = [], {}
+        for index, values in valid:
+            key = values["idempotency_key"]
+            if key in seen:
+                results[index] = dict(results[seen[key]], index=index, replayed=True)
+                replayed += 1
+                continue
+            if key:
+                seen[key] = index
+            queued.append(values)
+            results[index] = {"index": index, "queued": True, "pcb_id": values["pcb_id"]}
+        try:
+            submit_queued(queued)
+        except QueueFull as e:
+            return _queue_full_response(e)
+        return jsonify({
+            "success": True,
+            "queued": len(queued),
+            "replayed": replayed,
+            "failed": failed,
+            "results": results,
+        }), 202
+
+    try:
+        written = write_inspection_batch([values for _, values in valid]) if valid else []
+    except Exception as e:
+        logger.error(f"Error saving inspection batch: {e}")
+        return jsonify({"error": f"Failed to save inspections: {str(e)}"}), 500
+
+    inserted = 0
+    for (index, _), (inspection, duplicate) in zip(valid, written):
+        results[index] = {"index": index, "id": inspection["id"], "pcb_id": inspection["pcb_id"]}
+        if duplicate:
+            results[index]["replayed"] = True
+            replayed += 1
+        else:
+            inserted += 1
+
+    logger.info(f"✅ Bulk ingest: {inserted} inspections saved, {replayed} replayed, {failed} rejected")
+
+    return jsonify({
+        "success": True,
+        "inserted": inserted,
+        "replayed": replayed,
+        "failed": failed,
+        "results": results,
+    })
+
 # ---- Inspection Result (alias for inspections POST) ----
-@app.route("/api/inspection-result", methods=["POST"])
+@api.route("/api/inspection-result", methods=["POST"])
 def api_inspection_result():
     """Endpoint specifically for desktop app results"""
     return api_inspections()
 
 # ---- Stats ----
-@app.route("/api/stats", methods=["GET"])
+@api.route("/api/stats", methods=["GET"])
 def api_stats():
     return jsonify(get_stats())
 
+# ---- Rollup analytics ----
+ROLLUP_QUERY_MAX_BUCKETS = 1500
+
+def _rollup_range(args, default_granularity="hour", default_buckets=24):
+    """granularity/since/until from query args; defaults to the last few buckets"""
+    granularity = args.get("granularity", default_granularity)
+    if granularity not in GRANULARITIES:
+        raise ValueError(f"invalid granularity: {granularity!r}")
+    step = GRANULARITIES[granularity]
+    until = _parse_time(args, "until") or datetime.now() + step
+    since = _parse_time(args, "since") or until - step * (default_buckets + 1)
+    if (until - since) / step > ROLLUP_QUERY_MAX_BUCKETS:
+        raise ValueError(f"range too large (max {ROLLUP_QUERY_MAX_BUCKETS} {granularity} buckets)")
+    return granularity, since, until
+
+@api.route("/api/stats/timeseries", methods=["GET"])
+def api_stats_timeseries():
+    try:
+        granularity, since, until = _rollup_range(request.args)
+        points = rollup_engine.timeseries(granularity, since, until,
+                                          station=request.args.get("station"),
+                                          operator=request.args.get("operator"))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        logger.error(f"Error getting timeseries: {e}")
+        return jsonify({"error": str(e)}), 500
+    return jsonify({"granularity": granularity, "since": since.isoformat(), "until": until.isoformat(), "points": points})
+
+def _rollup_breakdown(dimension):
+    try:
+        granularity, since, until = _rollup_range(request.args, default_granularity="day", default_buckets=1)
+        rows = rollup_engine.breakdown(dimension, granularity, since, until)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        logger.error(f"Error getting {dimension} breakdown: {e}")
+        return jsonify({"error": str(e)}), 500
+    return jsonify({"granularity": granularity, "since": since.isoformat(), "until": until.isoformat(), dimension + "s": rows})
+
+@api.route("/api/stats/by-station", methods=["GET"])
+def api_stats_by_station():
+    return _rollup_breakdown("station")
+
+@api.route("/api/stats/by-operator", methods=["GET"])
+def api_stats_by_operator():
+    return _rollup_breakdown("operator")
+
+@api.cli.command("rollups-backfill")
+def rollups_backfill_command():
+    """Rebuild the rollup tables from the inspections table and the archive."""
+    rows = rollup_engine.backfill(archived_rows=archiver.iter_rows())
+    print(f"Rollups rebuilt from {rows} inspections")
+
+# ---- Images ----
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+
+def _send_immutable(path, mimetype, etag):
+    # conditional=True answers Range requests with 206 and If-None-Match with 304
+    response = send_file(path, mimetype=mimetype, conditional=True, etag=etag, max_age=IMMUTABLE_MAX_AGE)
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
+
+@api.route("/api/images", methods=["POST"])
+def api_upload_image():
+    """Store an image (raw image/* body or multipart field "file"); identical images are stored once"""
+    if request.content_length and request.content_length > IMAGES_CONFIG["max_upload_bytes"] + 64 * 1024:
+        return jsonify({"error": "image too large"}), 413
+    stream = request.files["file"].stream if "file" in request.files else request.stream
+    try:
+        name, size, created = image_store.save(stream)
+    except ImageTooLarge as e:
+        return jsonify({"error": str(e)}), 413
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    url, thumbnail_url = image_urls(name)
+    logger.info(f"🖼️  Image {'stored' if created else 'deduplicated'}: {name} ({size} bytes)")
+    # "image_path" is the value to send with the inspection
+    return jsonify({"success": True, "image_path": name, "url": url, "thumbnail_url": thumbnail_url,
+                    "size": size, "deduplicated": not created}), 201 if created else 200
+
+@api.route("/api/images/<name>", methods=["GET"])
+def api_get_image(name):
+    try:
+        path = image_store.path_for(name)
+    except ValueError:
+        return jsonify({"error": "Image not found"}), 404
+    if not os.path.exists(path):
+        return jsonify({"error": "Image not found"}), 404
+    return _send_immutable(path, MIMETYPES[name.rsplit(".", 1)[1]], name.split(".", 1)[0])
+
+@api.route("/api/images/<name>/thumbnail", methods=["GET"])
+def api_get_thumbnail(name):
+    try:
+        size = int(request.args.get("size", IMAGES_CONFIG["default_thumbnail_size"]))
+        source = image_store.path_for(name)
+    except ValueError:
+        return jsonify({"error": "invalid image name or size"}), 400
+    if not thumbnails.available:
+        # Pillow not installed: the original still renders, just heavier
+        return api_get_image(name)
+    try:
+        path = thumbnails.get(name, size)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except FileNotFoundError:
+        return jsonify({"error": "Image not found"}), 404
+    except Exception as e:
+        logger.error(f"Error generating thumbnail for {name}: {e}")
+        return _send_immutable(source, MIMETYPES[name.rsplit(".", 1)[1]], name.split(".", 1)[0])
+    return _send_immutable(path, "image/jpeg", f"{name.split('.', 1)[0]}-{size}")
+
+# ---- Archive ----
+@api.route("/api/archive/export", methods=["GET"])
+def api_archive_export():
+    """Stream archived inspections as NDJSON (?since=&until=&station=A,B&fields=&defects=)"""
+    try:
+        since, until = _parse_time(request.args, "since"), _parse_time(request.args, "until")
+        fields = [f for f in request.args.get("fields", "").split(",") if f]
+        unknown = set(fields) - set(INSPECTION_FIELDS)
+        if unknown:
+            raise ValueError(f"unknown fields: {', '.join(sorted(unknown))}")
+        native_defects = native_defects_requested(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    stations = [v for v in request.args.get("station", "").split(",") if v]
+
+    def generate():
+        chunk = []
+        for row in archiver.iter_rows(since, until, stations):
+            chunk.append(fastjson.dumps_bytes(project_inspection(row, fields, native_defects)) + b"\n")
+            if len(chunk) >= LISTING_CONFIG["stream_batch"]:
+                yield b"".join(chunk)
+                chunk = []
+        if chunk:
+            yield b"".join(chunk)
+
+    return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
+
+@api.cli.command("archive")
+def archive_command():
+    """Move inspections older than the hot window to the archive (one run)."""
+    rows = archiver.run_once()
+    print(f"Archived {rows} inspections older than {archiver.cutoff()}")
+
 # ---- Database Status ----
-@app.route("/api/database-status", methods=["GET"])
+@api.route("/api/database-status", methods=["GET"])
 def database_status():
     try:
-        conn = get_db_connection()
-        with conn.cursor() as cursor:
+        with db_connection() as conn, conn.cursor() as cursor:
             cursor.execute("SELECT COUNT(*) as count FROM inspections")
             count = cursor.fetchone()["count"]
-        conn.close()
         
         return jsonify({
             "status": "ok", 
             "message": "Database connection active",
             "database": DB_CONFIG["database"],
             "inspections_count": count,
+            "pool": db_pool.metrics(),
+            "cache": response_cache.metrics(),
+            "ingest": ingest_queue.metrics() if INGEST_CONFIG["write_behind"] else None,
+            "idempotency": idempotency_index.metrics(),
+            "archive": archiver.metrics() if ARCHIVE_CONFIG["enabled"] else None,
+            "alerts": alert_engine.metrics() if ALERTS_CONFIG["enabled"] else None,
+            "images": dict(image_store.metrics(), thumbnails=thumbnails.metrics()),
+            "scaleout": {
+                "message_queue": socketio.server.manager.name if SCALEOUT_CONFIG["message_queue"] else None,
+                "leader": leader.held,
+            },
             "integrations": {
                 "desktop_app": "Connected",
                 "next_dashboard": "Ready on localhost:3000"
@@ -375,49 +1161,81 @@ def database_status():
     except Exception as e:
         return jsonify({"status": "error", "message": str(e)}), 500
 
+# ---- Cached reference data ----
+response_cache = TTLCache()
+
+def cached_json(key, ttl, query):
+    """Serve a cached JSON list with an ETag; answers 304 on If-None-Match"""
+    def load():
+        with db_connection() as conn, conn.cursor() as cursor:
+            cursor.execute(query)
+            return fastjson.dumps_bytes(cursor.fetchall(), sort_keys=True)
+
+    entry = response_cache.get_or_load(key, ttl, load)
+    # Weak comparison: compressed responses carry the ETag as W/"..."
+    if request.if_none_match.contains_weak(entry.etag):
+        response = Response(status=304)
+    else:
+        response = Response(entry.body, mimetype="application/json")
+    response.set_etag(entry.etag)
+    # Let clients keep the body but revalidate on every poll
+    response.headers["Cache-Control"] = "no-cache"
+    return response
+
 # ---- Alerts ----
-@app.route("/api/alerts", methods=["GET", "POST"])
+@api.route("/api/alerts", methods=["GET", "POST"])
 def api_alerts():
-    conn = get_db_connection()
     if request.method == "GET":
-        with conn.cursor() as cursor:
-            cursor.execute("SELECT * FROM alerts ORDER BY id DESC LIMIT 50")
-            rows = cursor.fetchall()
-        conn.close()
-        return jsonify(rows)
+        return cached_json("alerts", CACHE_CONFIG["alerts_ttl"],
+                           "SELECT * FROM alerts ORDER BY id DESC LIMIT 50")
     elif request.method == "POST":
         data = request.json
-        with conn.cursor() as cursor:
+        level = data.get("level", "info")
+        if level not in migrations.ALERT_LEVELS:
+            return jsonify({"error": f"invalid level: {level!r}"}), 400
+        with db_connection() as conn, conn.cursor() as cursor:
             sql = "INSERT INTO alerts (message, level, ack, created_at) VALUES (%s, %s, %s, %s)"
             cursor.execute(sql, (
                 data.get("message", "Alerte"),
-                data.get("level", "info"),
+                level,
                 False,
                 datetime.now()
             ))
             conn.commit()
-        conn.close()
+        response_cache.invalidate("alerts")
         return jsonify({"success": True})
 
 # ---- AI Chat ----
-@app.route("/api/ai-chat", methods=["POST"])
+@api.route("/api/ai-chat", methods=["POST"])
 def api_ai_chat():
     data = request.json
     question = data.get("question", "")
     
-    # Enhanced AI responses based on database state
+    # Answer from the in-memory counters and the alert engine's sliding windows: no DB query
     try:
         stats = get_stats()
         response = f"🤖 Analyse IA: Actuellement {stats['total']} inspections en base. "
-        
-        if stats['defect_rate'] > 10:
+        active = alert_engine.active_alerts()
+        windows = alert_engine.window_summary("station")
+
+        if active:
+            response += f"{len(active)} alerte(s) en cours: " + "; ".join(alert["message"] for alert in active) + ". "
+        if windows:
+            station, window = max(windows.items(), key=lambda item: item[1]["defect_rate"])
+            minutes = ALERTS_CONFIG["window_seconds"] / 60
+            response += (f"Sur les {minutes:.0f} dernières minutes, la station la plus touchée est {station} "
+                         f"({window['defect_rate']:.1f}% de défauts sur {window['total']} inspections).")
+        elif stats['defect_rate'] > 10:
             response += f"Taux de défauts élevé ({stats['defect_rate']:.1f}%). Vérifiez les stations."
         elif stats['defect_rate'] < 2:
             response += f"Excellent taux de qualité ({100-stats['defect_rate']:.1f}%). Continuez!"
         else:
             response += f"Taux de défauts normal ({stats['defect_rate']:.1f}%)."
-            
-        suggestions = ["Analyser les tendances", "Vérifier les stations", "Consulter les stats"]
+
+        if active:
+            suggestions = ["Vérifier les stations en alerte", "Acquitter les alertes", "Consulter les stats"]
+        else:
+            suggestions = ["Analyser les tendances", "Vérifier les stations", "Consulter les stats"]
     except:
         response = f"🤖 Réponse IA: {question}"
         suggestions = ["Vérifier la station", "Relancer l'inspection", "Consulter les logs"]
@@ -425,7 +1243,7 @@ def api_ai_chat():
     return jsonify({"response": response, "suggestions": suggestions})
 
 # ---- Complaints ----
-@app.route("/api/complaints", methods=["POST"])
+@api.route("/api/complaints", methods=["POST"])
 def api_complaints():
     data = request.json
     logger.info(f"📩 Nouvelle réclamation reçue: {data}")
@@ -439,71 +1257,126 @@ def api_complaints():
     })
 
 # ---- Operators ----
-@app.route("/api/operators", methods=["GET", "POST"])
+@api.route("/api/operators", methods=["GET", "POST"])
 def api_operators():
-    conn = get_db_connection()
     if request.method == "GET":
-        with conn.cursor() as cursor:
-            cursor.execute("SELECT * FROM operators ORDER BY name")
-            rows = cursor.fetchall()
-        conn.close()
-        return jsonify(rows)
+        return cached_json("operators", CACHE_CONFIG["operators_ttl"], "SELECT * FROM operators ORDER BY name")
     elif request.method == "POST":
         data = request.json
-        with conn.cursor() as cursor:
+        with db_connection() as conn, conn.cursor() as cursor:
             cursor.execute("INSERT INTO operators (name, shift) VALUES (%s, %s)", 
                          (data["name"], data["shift"]))
             conn.commit()
-        conn.close()
+        response_cache.invalidate("operators")
         return jsonify({"success": True})
 
 # ---- Stations ----
-@app.route("/api/stations", methods=["GET", "POST"])
+@api.route("/api/stations", methods=["GET", "POST"])
 def api_stations():
-    conn = get_db_connection()
     if request.method == "GET":
-        with conn.cursor() as cursor:
-            cursor.execute("SELECT * FROM stations ORDER BY name")
-            rows = cursor.fetchall()
-        conn.close()
-        return jsonify(rows)
+        return cached_json("stations", CACHE_CONFIG["stations_ttl"], "SELECT * FROM stations ORDER BY name")
     elif request.method == "POST":
         data = request.json
-        with conn.cursor() as cursor:
+        with db_connection() as conn, conn.cursor() as cursor:
             cursor.execute("INSERT INTO stations (name, line) VALUES (%s, %s)", 
                          (data["name"], data["line"]))
             conn.commit()
-        conn.close()
+        response_cache.invalidate("stations")
+        station_directory.invalidate()
         return jsonify({"success": True})
 
 # -----------------------------------------------------------
 # Socket.IO Events for real-time communication
 # -----------------------------------------------------------
 @socketio.on("connect")
+@timed_socket_handler("connect")
 def on_connect():
+    start_background_tasks()
     logger.info(f"🔌 Client connecté: {request.sid}")
+    # ?stations=A,B&lines=L1 subscribes right away; otherwise the client gets everything
+    try:
+        subscribed = _subscribe(*parse_subscription(request.args))
+    except ValueError:
+        subscribed = []
+    if not subscribed:
+        join_room(ALL_ROOM)
     # Send initial data to new client
     emit("initial-data", {
         "type": "initial-data", 
         "data": {
             "message": "Connecté au backend Flask",
-            "stats": get_stats()
+            "stats": _subscription_stats(subscribed),
+            "rooms": subscribed,
         }
     })
 
 @socketio.on("disconnect")
+@timed_socket_handler("disconnect")
 def on_disconnect():
     logger.info(f"🔌 Client déconnecté: {request.sid}")
 
 @socketio.on("ping")
+@timed_socket_handler("ping")
 def on_ping():
     emit("pong", {"type": "pong", "timestamp": datetime.now().isoformat()})
 
 @socketio.on("request_stats")
+@timed_socket_handler("request_stats")
 def on_request_stats():
-    emit("stats-update", {"type": "stats-update", "data": get_stats()})
+    emit("stats-update", {"type": "stats-update", "data": _subscription_stats(_subscribed_rooms())})
+
+def _subscribed_rooms():
+    return [room for room in rooms() if is_filter_room(room)]
+
+def _subscribe(stations, lines):
+    """Join the station/line rooms of the current client; returns its filter rooms."""
+    new_rooms = [station_room(station) for station in stations] + [line_room(line) for line in lines]
+    for room in new_rooms:
+        join_room(room)
+    if new_rooms:
+        leave_room(ALL_ROOM)
+    return _subscribed_rooms()
+
+def _subscription_stats(subscribed):
+    """Stats over every station the client watches (all stations when unsubscribed)."""
+    if not subscribed:
+        return get_stats()
+    stations = set()
+    for room in subscribed:
+        stations.update(station_directory.stations_for(room))
+    return get_stats(sorted(stations))
+
+@socketio.on("subscribe")
+@timed_socket_handler("subscribe")
+def on_subscribe(data):
+    """{"stations": [...], "lines": [...]}: only receive events for these"""
+    try:
+        subscribed = _subscribe(*parse_subscription(data))
+    except ValueError as e:
+        emit("subscription-error", {"error": str(e)})
+        return
+    emit("subscribed", {"rooms": subscribed, "stats": _subscription_stats(subscribed),
+                        "room_stats": {room: get_stats(station_directory.stations_for(room)) for room in subscribed}})
+
+@socketio.on("unsubscribe")
+@timed_socket_handler("unsubscribe")
+def on_unsubscribe(data=None):
+    """Leave the given station/line rooms (all of them when empty); back to "all" when none remain"""
+    try:
+        stations, lines = parse_subscription(data)
+    except ValueError as e:
+        emit("subscription-error", {"error": str(e)})
+        return
+    leaving = [station_room(station) for station in stations] + [line_room(line) for line in lines]
+    for room in leaving or _subscribed_rooms():
+        leave_room(room)
+    subscribed = _subscribed_rooms()
+    if not subscribed:
+        join_room(ALL_ROOM)
+    emit("subscribed", {"rooms": subscribed, "stats": _subscription_stats(subscribed)})
 
 @socketio.on("desktop_app_connected")
+@timed_socket_handler("desktop_app_connected")
 def on_desktop_app_connected(data):
     logger.info(f"🖥️  Desktop app connected: {data}")
     emit("desktop_status", {"status": "connected", "timestamp": datetime.now().isoformat()})
@@ -511,33 +1384,114 @@ def on_desktop_app_connected(data):
 # -----------------------------------------------------------
 # Background task for periodic stats broadcast
 # -----------------------------------------------------------
-import threading
-import time
-
 def periodic_stats_broadcast():
-    """Broadcast stats every 30 seconds"""
+    """Broadcast stats every 30 seconds (cooperative under eventlet/gevent).
+
+    Single worker: every process broadcasts its own stats. With a message
+    queue only the elected leader does, re-reading the aggregate each time
+    since the other workers' inserts are not in its counters.
+    """
+    scaled_out = bool(SCALEOUT_CONFIG["message_queue"])
+    interval = SCALEOUT_CONFIG["leader_stats_interval"] if scaled_out else SERVER_CONFIG["stats_broadcast_interval"]
     while True:
-        time.sleep(30)
+        socketio.sleep(interval)
+        db_pool.evict_idle()
+        if scaled_out and not leader.is_leader():
+            continue
+        try:
+            if scaled_out:
+                stats_engine.reconcile()
+            else:
+                stats_engine.maybe_reconcile()
+        except Exception as e:
+            logger.error(f"Error reconciling stats: {e}")
         broadcast_stats()
 
-# Start background thread
-stats_thread = threading.Thread(target=periodic_stats_broadcast, daemon=True)
-stats_thread.start()
+def periodic_archive():
+    """Move rows older than the hot window out of the inspections table"""
+    while True:
+        socketio.sleep(ARCHIVE_CONFIG["interval"])
+        if SCALEOUT_CONFIG["message_queue"] and not leader.is_leader():
+            continue
+        try:
+            archiver.run_once()
+        except Exception as e:
+            logger.error(f"Error archiving inspections: {e}")
+
+_background_tasks_lock = threading.Lock()
+_background_tasks_pid = None
+
+def start_background_tasks():
+    """Start the per-process background tasks once.
+
+    Called on the first request/socket connection rather than at import, so
+    each gunicorn worker starts its own after the fork and importing the
+    module (tests, CLI commands, benchmarks) starts nothing.
+    """
+    global _background_tasks_pid
+    if _background_tasks_pid == os.getpid():
+        return
+    with _background_tasks_lock:
+        if _background_tasks_pid == os.getpid():
+            return
+        _background_tasks_pid = os.getpid()
+        socketio.start_background_task(periodic_stats_broadcast)
+        # Write-behind mode: replay the journal and start draining right away
+        if INGEST_CONFIG["write_behind"]:
+            ingest_queue.start()
+        if ARCHIVE_CONFIG["enabled"]:
+            socketio.start_background_task(periodic_archive)
+        logger.info(f"⏱️  Background tasks started in process {_background_tasks_pid}")
+
+@api.before_app_request
+def _ensure_background_tasks():
+    start_background_tasks()
+
+# -----------------------------------------------------------
+# Application factory
+# -----------------------------------------------------------
+def create_app(overrides=None):
+    """Build the Flask app: ``flask --app backend``, wsgi.py and ``python backend.py`` all go through here.
+
+    Nothing here touches the database or starts a task: the pool connects
+    on first checkout, the stats engine seeds on first read, and the
+    background tasks start with the first request or socket connection.
+    Socket.IO supports one app per process, so the last app built wins.
+    """
+    app = Flask(__name__)
+    app.config["SECRET_KEY"] = config.SECRET_KEY
+    app.config.update(overrides or {})
+    app.json = fastjson.FastJSONProvider(app)
+    CORS(app, resources={r"/*": {"origins": "*"}})
+    app.register_blueprint(api)
+
+    # Long-polling payloads are compressed by engine.io above the same threshold as HTTP responses
+    socketio.init_app(app, cors_allowed_origins="*", async_mode=SERVER_CONFIG["async_mode"],
+                      json=fastjson, http_compression=True,
+                      compression_threshold=COMPRESSION_CONFIG["min_size"],
+                      **socketio_queue_options(SCALEOUT_CONFIG))
+    return app
 
 # -----------------------------------------------------------
 # Lancement serveur
 # -----------------------------------------------------------
 if __name__ == "__main__":
-    # Initialize database on startup
+    app = create_app()
+    # Only check the schema version; migrations run with: flask --app backend migrate
     try:
-        init_database()
-        logger.info("✅ Database initialized successfully")
+        logger.info(f"✅ Database schema at version {check_schema()}")
+    except migrations.SchemaOutOfDate as e:
+        logger.error(f"❌ {e}")
+        raise SystemExit(1)
     except Exception as e:
-        logger.error(f"❌ Error initializing database: {e}")
+        logger.error(f"❌ Error checking database schema: {e}")
     
-    port = 5000
-    logger.info(f"🚀 PCB Inspector Flask Backend sur http://localhost:{port}")
+    port = SERVER_CONFIG["port"]
+    logger.info(f"🚀 PCB Inspector Flask Backend sur http://localhost:{port} ({socketio.async_mode})")
     logger.info(f"📊 Dashboard Next.js: http://localhost:3000")
     logger.info(f"🖥️  Desktop App ready to connect")
-    
-    socketio.run(app, host="0.0.0.0", port=port, debug=True, allow_unsafe_werkzeug=True)
+    start_background_tasks()
+
+    # Production deployments go through gunicorn (see wsgi.py / gunicorn.conf.py)
+    socketio.run(app, host=SERVER_CONFIG["host"], port=port, debug=SERVER_CONFIG["debug"],
+                 use_reloader=SERVER_CONFIG["debug"], allow_unsafe_werkzeug=socketio.async_mode == "threading")
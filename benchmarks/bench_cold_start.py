@@ -0,0 +1,103 @@
+"""Cold start: fresh interpreter to first answered request.
+
+Each run spawns a new Python process that imports the entry point, builds
+the app with create_app() and answers GET / through the test client, which
+is what a new gunicorn worker does before it can serve. No database is
+needed: none of these steps may touch it, e.g.:
+
+    python -m benchmarks.bench_cold_start --runs 10 --target-ms 1000
+
+Also fails when importing or building the app opens a DB connection or
+starts a thread (those belong to the first request). Exits 1 when the
+median total exceeds the target.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+CHILD = """
+import json, sys, threading, time
+started = time.perf_counter()
+if sys.argv[1] == "wsgi":
+    import wsgi as entry
+    import backend
+    app = entry.app
+    imported = created = time.perf_counter()
+else:
+    import backend
+    imported = time.perf_counter()
+    app = backend.create_app()
+    created = time.perf_counter()
+threads = threading.active_count()
+connections = backend.db_pool.metrics()["created"]
+response = app.test_client().get("/")
+served = time.perf_counter()
+print(json.dumps({
+    "import_ms": (imported - started) * 1000,
+    "create_app_ms": (created - imported) * 1000,
+    "first_request_ms": (served - created) * 1000,
+    "threads_before_request": threads,
+    "db_connections_before_request": connections,
+    "status": response.status_code,
+}))
+"""
+
+PHASES = ("import_ms", "create_app_ms", "first_request_ms", "total_ms")
+
+
+def run_once(entry):
+    started = time.perf_counter()
+    output = subprocess.run([sys.executable, "-c", CHILD, entry], capture_output=True, text=True,
+                            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    total_ms = (time.perf_counter() - started) * 1000
+    if output.returncode != 0:
+        raise SystemExit(f"cold start failed:\n{output.stderr}")
+    result = json.loads(output.stdout.strip().splitlines()[-1])
+    result["total_ms"] = total_ms
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--entry", choices=("backend", "wsgi"), default="backend",
+                        help="wsgi: the gunicorn path, monkey-patching included (ASYNC_MODE)")
+    parser.add_argument("--target-ms", type=float, default=1000.0,
+                        help="median process start to first response, interpreter start-up included")
+    parser.add_argument("--json", help="also write results to this file")
+    args = parser.parse_args()
+
+    runs = [run_once(args.entry) for _ in range(args.runs)]
+    summary = {phase: round(statistics.median(run[phase] for run in runs), 1) for phase in PHASES}
+
+    print(f"cold start via {args.entry}, median of {args.runs} runs")
+    for phase in PHASES:
+        print(f"  {phase:<18}{summary[phase]:>9.1f}")
+
+    problems = []
+    if any(run["status"] != 200 for run in runs):
+        problems.append(f"GET / answered {sorted({run['status'] for run in runs})}")
+    if any(run["db_connections_before_request"] for run in runs):
+        problems.append("the database was contacted before the first request")
+    if any(run["threads_before_request"] > 1 for run in runs):
+        problems.append(f"{max(run['threads_before_request'] for run in runs) - 1} thread(s) started before the first request")
+    if summary["total_ms"] > args.target_ms:
+        problems.append(f"median {summary['total_ms']:.0f} ms is over the {args.target_ms:.0f} ms target")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as output:
+            json.dump({"summary": summary, "target_ms": args.target_ms, "runs": runs}, output, indent=2)
+
+    for problem in problems:
+        print(f"FAIL: {problem}")
+    if problems:
+        raise SystemExit(1)
+    print(f"OK: under the {args.target_ms:.0f} ms target")
+
+
+if __name__ == "__main__":
+    main()
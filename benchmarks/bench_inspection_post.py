@@ -0,0 +1,60 @@
+"""Latency and DB round trips of POST /api/inspections.
+
+Runs against the database configured in backend.DB_CONFIG (override with
+--host/--user/--password/--database/--port), e.g.:
+
+    python -m benchmarks.bench_inspection_post -n 500 --host 127.0.0.1 --user root --password pcb
+
+Before the read-after-write SELECT was removed a POST cost three round trips
+(INSERT, COMMIT, SELECT ... WHERE id=%s); it now costs one (INSERT).
+"""
+import argparse
+import statistics
+import time
+
+from benchmarks.harness import percentile
+from benchmarks.roundtrips import RoundTripCounter
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-n", "--requests", type=int, default=200)
+    for option in ("host", "user", "password", "database"):
+        parser.add_argument(f"--{option}")
+    parser.add_argument("--port", type=int)
+    args = parser.parse_args()
+
+    import backend
+    for option in ("host", "user", "password", "database", "port"):
+        if getattr(args, option) is not None:
+            backend.DB_CONFIG[option] = getattr(args, option)
+
+    client = backend.create_app().test_client()
+    payload = {
+        "status": "passed", "operator": "bench", "station": "bench-1",
+        "defects": [], "confidence": 97.5, "processing_time": 1.8,
+    }
+
+    # Warm the pool and the stats engine so they do not skew the first samples
+    client.post("/api/inspections", json=payload)
+    backend.get_stats()
+
+    latencies = []
+    with RoundTripCounter() as counter:
+        counter.reset()
+        for _ in range(args.requests):
+            started = time.perf_counter()
+            response = client.post("/api/inspections", json=payload)
+            latencies.append((time.perf_counter() - started) * 1000)
+            if response.status_code != 200:
+                raise SystemExit(f"POST failed: {response.status_code} {response.get_data(as_text=True)}")
+        round_trips, statements = counter.snapshot()
+
+    print(f"POST /api/inspections x{args.requests}")
+    print(f"  latency ms  p50={percentile(latencies, 50):.2f} p95={percentile(latencies, 95):.2f} "
+          f"p99={percentile(latencies, 99):.2f} mean={statistics.mean(latencies):.2f}")
+    print(f"  round trips per request: {round_trips / args.requests:.2f} {statements}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""Payload size and CPU cost of serializing an inspections listing.
+
+No database needed: rows shaped like the SELECT in build_inspection_query
+are generated and pushed through the same code path as GET
+/api/inspections, e.g.:
+
+    python -m benchmarks.bench_serialization --rows 1000 --repeat 50
+
+Reported per variant: encode time (format_inspection + JSON), body size, and
+the size and compression time for gzip and brotli (when installed). The
+baseline is the stdlib encoder, configured as Flask's default provider
+(sorted keys), with defects as JSON strings.
+"""
+import argparse
+from datetime import datetime, timedelta
+import json
+import random
+import statistics
+import time
+
+from benchmarks.harness import synthetic_inspection
+
+
+def listing_rows(count, rng):
+    started = datetime(2026, 1, 1)
+    rows = []
+    for i in range(count):
+        inspection = synthetic_inspection(rng)
+        rows.append(dict(
+            inspection,
+            id=i + 1,
+            pcb_id=f"PCB-{i + 1:08d}",
+            defects=json.dumps(inspection["defects"]),
+            timestamp=started + timedelta(seconds=i),
+        ))
+    return rows
+
+
+def _timed(func, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        samples.append((time.perf_counter() - started) * 1000)
+    return result, statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=30)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", help="also write results to this file")
+    args = parser.parse_args()
+
+    import backend
+    import compression
+    import fastjson
+
+    rows = listing_rows(args.rows, random.Random(args.seed))
+
+    def stdlib(native):
+        return lambda: json.dumps({"inspections": [backend.format_inspection(row, native) for row in rows]},
+                                  sort_keys=True, separators=(",", ":")).encode()
+
+    def fast(native):
+        return lambda: fastjson.dumps_bytes({"inspections": [backend.format_inspection(row, native) for row in rows]},
+                                            sort_keys=True)
+
+    variants = (
+        ("stdlib json, defects as string", stdlib(False)),
+        ("stdlib json, native defects", stdlib(True)),
+        (f"{fastjson.BACKEND}, defects as string", fast(False)),
+        (f"{fastjson.BACKEND}, native defects", fast(True)),
+    )
+    encodings = ["gzip"] + (["br"] if compression.brotli is not None else [])
+    config = backend.COMPRESSION_CONFIG
+
+    results = []
+    baseline = None
+    print(f"{args.rows} rows, median of {args.repeat} runs")
+    header = f"{'variant':<34}{'encode ms':>10}{'bytes':>10}" + "".join(
+        f"{enc + ' bytes':>12}{enc + ' ms':>9}" for enc in encodings)
+    print(header)
+    print("-" * len(header))
+    for label, encode in variants:
+        body, encode_ms = _timed(encode, args.repeat)
+        result = {"variant": label, "encode_ms": round(encode_ms, 2), "bytes": len(body)}
+        line = f"{label:<34}{encode_ms:>10.2f}{len(body):>10}"
+        for encoding in encodings:
+            compressed, compress_ms = _timed(
+                lambda: compression.compress_bytes(body, encoding, config["gzip_level"], config["brotli_quality"]),
+                args.repeat)
+            result[f"{encoding}_bytes"] = len(compressed)
+            result[f"{encoding}_ms"] = round(compress_ms, 2)
+            line += f"{len(compressed):>12}{compress_ms:>9.2f}"
+        print(line)
+        baseline = baseline or result
+        results.append(result)
+
+    best = results[-1]
+    print(f"\n{best['variant']} vs {baseline['variant']}: "
+          f"encode {baseline['encode_ms'] / best['encode_ms']:.1f}x faster, "
+          f"body {100 * (1 - best['bytes'] / baseline['bytes']):.0f}% smaller, "
+          f"gzip on the wire {100 * (1 - best['gzip_bytes'] / baseline['bytes']):.0f}% smaller")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as output:
+            json.dump(results, output, indent=2)
+
+
+if __name__ == "__main__":
+    main()
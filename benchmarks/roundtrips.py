@@ -0,0 +1,52 @@
+"""Count MySQL protocol round trips issued by pymysql.
+
+Every client command (COM_QUERY, COM_PING, ...) is one network round trip,
+so wrapping ``Connection._execute_command`` gives an exact count without
+touching the code under test. Round trips are also attributed to whatever
+label ``label()`` returns on the calling thread (the harness uses the Flask
+endpoint being served).
+"""
+from collections import Counter
+import threading
+
+import pymysql.connections
+
+
+class RoundTripCounter:
+    def __init__(self, label=None):
+        self._lock = threading.Lock()
+        self._original = None
+        self._label = label or (lambda: None)
+        self.total = 0
+        self.statements = Counter()
+        self.by_label = Counter()
+
+    def __enter__(self):
+        self._original = pymysql.connections.Connection._execute_command
+        original = self._original
+        counter = self
+
+        def _execute_command(conn, command, sql):
+            label = counter._label() or "background"
+            with counter._lock:
+                counter.total += 1
+                text = sql.decode(errors="replace") if isinstance(sql, bytes) else str(sql)
+                counter.statements[(text.split(None, 1) or ["?"])[0].upper()] += 1
+                counter.by_label[label] += 1
+            return original(conn, command, sql)
+
+        pymysql.connections.Connection._execute_command = _execute_command
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        pymysql.connections.Connection._execute_command = self._original
+
+    def reset(self):
+        with self._lock:
+            self.total = 0
+            self.statements.clear()
+            self.by_label.clear()
+
+    def snapshot(self):
+        with self._lock:
+            return self.total, dict(self.statements)
@@ -0,0 +1,160 @@
+"""Coalesced Socket.IO fan-out for inspection and stats events.
+
+Request handlers only enqueue; a background task flushes at most once per
+``window`` seconds, so a burst of N boards costs one ``stats-update`` and
+one batched ``new-inspections`` emit instead of N of each.
+"""
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class BroadcastScheduler:
+    """Queues broadcasts and flushes them from a single background task.
+
+    - one queued inspection is sent as the legacy ``new-inspection`` event,
+      several as one ``new-inspections`` event whose ``data`` is a list;
+    - stats are recomputed once per flush; with ``stats_delta`` only the
+      counters that changed since the last emit are sent (``"delta": True``);
+    - with ``stats_on_insert=False`` queued inspections do not trigger a
+      stats-update (another process owns the stats, see scaleout.py);
+    - with ``default_room`` unfiltered events go to that room only, and
+      ``room_of(inspection)`` / ``room_stats()`` add per-room inspection
+      batches and stats-updates (tagged with ``"room"``), see rooms.py.
+    """
+
+    def __init__(self, socketio, stats_provider, window=0.5, stats_delta=True, max_batch=500,
+                 on_emit=None, stats_on_insert=True, default_room=None, room_of=None, room_stats=None):
+        self.socketio = socketio
+        self.stats_provider = stats_provider
+        self.window = window
+        self.stats_delta = stats_delta
+        self.max_batch = max_batch
+        self.on_emit = on_emit  # callback(event, seconds spent in emit)
+        self.stats_on_insert = stats_on_insert
+        self.default_room = default_room
+        self.room_of = room_of          # inspection -> tuple of rooms
+        self.room_stats = room_stats    # () -> {room: stats dict}
+
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._inspections = []
+        self._stats_dirty = False
+        self._last_stats = {}  # room (None for default_room) -> last stats sent
+        self._task = None
+
+        self.flushes = 0
+        self.emits = 0
+
+    # ------------------------------------------------------------------
+    # Producers (called from request handlers, must stay cheap)
+    # ------------------------------------------------------------------
+    def queue_inspection(self, inspection):
+        self.queue_inspections((inspection,))
+
+    def queue_inspections(self, inspections):
+        with self._lock:
+            self._inspections.extend(inspections)
+            self._stats_dirty = self._stats_dirty or self.stats_on_insert
+        self._ensure_started()
+        self._wakeup.set()
+
+    def request_stats(self):
+        with self._lock:
+            self._stats_dirty = True
+        self._ensure_started()
+        self._wakeup.set()
+
+    # ------------------------------------------------------------------
+    # Consumer
+    # ------------------------------------------------------------------
+    def send_full_stats(self, stats_data=None):
+        """Emit complete stats-updates and use them as the new delta baselines."""
+        stats_data = stats_data if stats_data is not None else self.stats_provider()
+        self._emit_stats(None, stats_data, full=True)
+        if self.room_stats is not None:
+            for room, room_data in self.room_stats().items():
+                self._emit_stats(room, room_data, full=True)
+        return stats_data
+
+    def send_alert(self, alert, to=None):
+        """Emit a new-alert right away: alerts are rare and never coalesced."""
+        self._emit("new-alert", alert, to=to)
+
+    def flush(self):
+        with self._lock:
+            inspections, self._inspections = self._inspections, []
+            stats_dirty, self._stats_dirty = self._stats_dirty, False
+        if not inspections and not stats_dirty:
+            return
+
+        for start in range(0, len(inspections), self.max_batch):
+            batch = inspections[start:start + self.max_batch]
+            self._emit_inspections(batch, self.default_room)
+            if self.room_of is not None:
+                groups = {}
+                for inspection in batch:
+                    groups.setdefault(self.room_of(inspection), []).append(inspection)
+                for rooms, group in groups.items():
+                    # One emit per group: a client in several of these rooms gets it once
+                    self._emit_inspections(group, list(rooms))
+        if inspections:
+            logger.info(f"📡 {len(inspections)} new inspection(s) broadcasted")
+
+        if stats_dirty:
+            self._flush_stats()
+        self.flushes += 1
+
+    def _flush_stats(self):
+        self._emit_stats(None, self.stats_provider())
+        if self.room_stats is not None:
+            for room, room_data in self.room_stats().items():
+                self._emit_stats(room, room_data)
+
+    def _emit_inspections(self, batch, to):
+        if len(batch) == 1:
+            self._emit("new-inspection", {"type": "new-inspection", "data": batch[0]}, to)
+        else:
+            self._emit("new-inspections", {"type": "new-inspections", "data": batch, "count": len(batch)}, to)
+
+    def _emit_stats(self, room, stats_data, full=False):
+        with self._lock:
+            previous = self._last_stats.get(room)
+            self._last_stats[room] = dict(stats_data)
+        payload = {"type": "stats-update", "data": stats_data}
+        if not full and self.stats_delta and previous is not None:
+            changed = {k: v for k, v in stats_data.items() if previous.get(k) != v}
+            if not changed:
+                return
+            payload = {"type": "stats-update", "data": changed, "delta": True}
+        if room is not None:
+            payload["room"] = room
+        self._emit("stats-update", payload, room if room is not None else self.default_room)
+
+    def _emit(self, event, payload, to=None):
+        started = time.perf_counter()
+        self.socketio.emit(event, payload, to=to)
+        self.emits += 1
+        if self.on_emit is not None:
+            self.on_emit(event, time.perf_counter() - started)
+
+    def _ensure_started(self):
+        if self._task is not None:
+            return
+        with self._lock:
+            if self._task is not None:
+                return
+            self._task = self.socketio.start_background_task(self._run)
+
+    def _run(self):
+        while True:
+            self._wakeup.wait()
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Error flushing broadcasts: {e}")
+            # Anything queued meanwhile waits for the next window.
+            self.socketio.sleep(self.window)
@@ -0,0 +1,91 @@
+"""Small in-process TTL cache for serialized reference-data responses."""
+import hashlib
+import threading
+import time
+
+
+class CacheEntry:
+    __slots__ = ("body", "etag", "expires_at")
+
+    def __init__(self, body, ttl):
+        self.body = body
+        self.etag = hashlib.sha1(body).hexdigest()
+        self.expires_at = time.monotonic() + ttl
+
+
+class TTLCache:
+    """Key -> serialized body with a per-key TTL, explicit invalidation and hit/miss counters.
+
+    ``get_or_load`` runs at most one loader per key at a time, so a burst of
+    dashboard polls after an expiry costs one database round trip.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._loading = {}  # key -> lock held while that key is being loaded
+        self._generations = {}  # key -> bumped on invalidation
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires_at > time.monotonic():
+                self.hits += 1
+                return entry
+            self.misses += 1
+            return None
+
+    def set(self, key, body, ttl):
+        entry = CacheEntry(body, ttl)
+        with self._lock:
+            self._entries[key] = entry
+        return entry
+
+    def get_or_load(self, key, ttl, loader):
+        """Return the cached entry or store ``loader()`` (bytes) for ``ttl`` seconds."""
+        entry = self.get(key)
+        if entry is not None:
+            return entry
+        with self._lock:
+            key_lock = self._loading.setdefault(key, threading.Lock())
+        with key_lock:
+            # Another request may have loaded it while we waited
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None and entry.expires_at > time.monotonic():
+                    return entry
+                generation = self._generations.get(key, 0)
+            entry = CacheEntry(loader(), ttl)
+            with self._lock:
+                # Do not store a body that was read before an invalidation
+                if self._generations.get(key, 0) == generation:
+                    self._entries[key] = entry
+            return entry
+
+    def invalidate(self, *keys):
+        with self._lock:
+            for key in keys:
+                self._generations[key] = self._generations.get(key, 0) + 1
+                if self._entries.pop(key, None) is not None:
+                    self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self.invalidations += len(self._entries)
+            for key in self._entries:
+                self._generations[key] = self._generations.get(key, 0) + 1
+            self._entries.clear()
+
+    def metrics(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 3) if lookups else 0.0,
+                "invalidations": self.invalidations,
+            }
@@ -0,0 +1,97 @@
+"""gzip/brotli response compression negotiated from Accept-Encoding.
+
+Applied in an ``after_request`` hook to JSON and NDJSON bodies above a size
+threshold, including streamed exports, which are compressed chunk by chunk.
+brotli is optional; without it only gzip is offered.
+"""
+import zlib
+
+try:
+    import brotli
+except ImportError:  # optional, gzip is always available
+    brotli = None
+
+COMPRESSIBLE_MIMETYPES = ("application/json", "application/x-ndjson", "text/")
+
+
+def negotiate(accept_encoding):
+    """Pick "br", "gzip" or None from an Accept-Encoding header (q-values honoured)."""
+    accepted = {}
+    for part in (accept_encoding or "").split(","):
+        name, _, params = part.strip().partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name] = quality
+    wildcard = accepted.get("*", 0.0)
+    candidates = (("br", "gzip") if brotli is not None else ("gzip",))
+    best, best_quality = None, 0.0
+    for encoding in candidates:
+        quality = accepted.get(encoding, wildcard)
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def _compressor(encoding, gzip_level, brotli_quality):
+    if encoding == "br":
+        compressor = brotli.Compressor(quality=brotli_quality)
+        return compressor.process, compressor.flush, compressor.finish
+    compressor = zlib.compressobj(gzip_level, zlib.DEFLATED, 31)  # 31: gzip container
+    return compressor.compress, lambda: compressor.flush(zlib.Z_SYNC_FLUSH), compressor.flush
+
+
+def compress_bytes(data, encoding, gzip_level=6, brotli_quality=4):
+    process, _, finish = _compressor(encoding, gzip_level, brotli_quality)
+    return process(data) + finish()
+
+
+def _compress_stream(chunks, encoding, gzip_level, brotli_quality):
+    process, flush, finish = _compressor(encoding, gzip_level, brotli_quality)
+    try:
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode()
+            # Flush per chunk so a slow export still reaches the client progressively
+            data = process(chunk) + flush()
+            if data:
+                yield data
+        yield finish()
+    finally:
+        close = getattr(chunks, "close", None)
+        if close is not None:
+            close()
+
+
+def compress_response(response, accept_encoding, min_size=1024, gzip_level=6, brotli_quality=4):
+    """Compress ``response`` in place when the client accepts it and it is worth it."""
+    if (response.status_code < 200 or response.status_code in (204, 206, 304)
+            or response.direct_passthrough
+            or "Content-Encoding" in response.headers
+            or not (response.mimetype or "").startswith(COMPRESSIBLE_MIMETYPES)):
+        return response
+    if not response.is_streamed and response.calculate_content_length() < min_size:
+        return response
+    encoding = negotiate(accept_encoding)
+    if encoding is None:
+        return response
+
+    if response.is_streamed:
+        response.response = _compress_stream(response.response, encoding, gzip_level, brotli_quality)
+        response.headers.pop("Content-Length", None)
+    else:
+        response.set_data(compress_bytes(response.get_data(), encoding, gzip_level, brotli_quality))
+    response.headers["Content-Encoding"] = encoding
+    response.vary.add("Accept-Encoding")
+    # The compressed bytes differ from the identity body: only a weak validator still holds
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+    return response
@@ -1,7 +1,22 @@
+"""Environment-driven settings shared by backend.py and its tools.
+
+A ``.env`` file in the working directory is loaded first (python-dotenv);
+real environment variables win over it. The defaults are the values the
+app shipped with, so an environment without any of these variables keeps
+working as before.
+"""
+import os
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
 DB_CONFIG = {
-    "host": "b8rwvnqo0smbmfgxr9ko-mysql.services.clever-cloud.com",
-    "user": "utvn9ejhfssla87g",
-    "password": "4nQQQQ6MUF1h7IMBGpAo",  # your Azure MySQL password
-    "database": "b8rwvnqo0smbmfgxr9ko",
-    "port": 3306,
+    "host": os.environ.get("DB_HOST", "b8rwvnqo0smbmfgxr9ko-mysql.services.clever-cloud.com"),
+    "user": os.environ.get("DB_USER", "utvn9ejhfssla87g"),   # si 1045 persiste, essaie sans suffixe: "dygfagkjzy"
+    "password": os.environ.get("DB_PASSWORD", "4nQQQQ6MUF1h7IMBGpAo"),
+    "database": os.environ.get("DB_NAME", "b8rwvnqo0smbmfgxr9ko"),
+    "port": int(os.environ.get("DB_PORT", "3306")),
 }
+
+SECRET_KEY = os.environ.get("SECRET_KEY", "pcb-inspector-secret-key-2024")
@@ -0,0 +1,284 @@
+"""Bounded, thread-safe MySQL connection pool used behind get_db_connection()."""
+from contextlib import contextmanager
+import logging
+import threading
+import time
+
+import pymysql
+from pymysql.constants import SERVER_STATUS
+
+logger = logging.getLogger(__name__)
+
+
+class PoolTimeout(Exception):
+    """Raised when no connection could be checked out within the timeout."""
+
+
+class PooledConnection:
+    """Proxy around a pymysql connection; close() hands it back to the pool."""
+
+    def __init__(self, pool, raw):
+        self._pool = pool
+        self._raw = raw
+        self._released = False
+
+    def __getattr__(self, name):
+        return getattr(self._raw, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close(discard=isinstance(exc, (pymysql.err.OperationalError, pymysql.err.InterfaceError)))
+
+    @property
+    def raw(self):
+        return self._raw
+
+    def close(self, discard=False):
+        if self._released:
+            return
+        self._released = True
+        self._pool.release(self._raw, discard=discard)
+
+
+class _Slot:
+    __slots__ = ("conn", "created_at", "last_used")
+
+    def __init__(self, conn):
+        now = time.monotonic()
+        self.conn = conn
+        self.created_at = now
+        self.last_used = now
+
+
+class ConnectionPool:
+    """Keeps between min_size and max_size open connections.
+
+    - connections idle for more than ``ping_interval`` seconds are pinged on
+      checkout and replaced if the ping fails;
+    - connections idle for more than ``idle_timeout`` seconds (above
+      ``min_size``) or older than ``max_lifetime`` are recycled;
+    - callers block up to ``acquire_timeout`` seconds when the pool is full.
+    """
+
+    def __init__(self, factory, min_size=1, max_size=10, acquire_timeout=10.0,
+                 idle_timeout=300.0, max_lifetime=3600.0, ping_interval=5.0):
+        if min_size < 0 or max_size < 1 or min_size > max_size:
+            raise ValueError("invalid pool bounds: min_size=%s max_size=%s" % (min_size, max_size))
+        self._factory = factory
+        self.min_size = min_size
+        self.max_size = max_size
+        self.acquire_timeout = acquire_timeout
+        self.idle_timeout = idle_timeout
+        self.max_lifetime = max_lifetime
+        self.ping_interval = ping_interval
+
+        self._cond = threading.Condition()
+        self._idle = []  # LIFO: hottest connection is reused first
+        self._in_use = {}  # id(raw) -> _Slot
+        self._opening = 0
+        self._closed = False
+
+        self._stats = {
+            "created": 0,
+            "recycled": 0,
+            "checkouts": 0,
+            "waits": 0,
+            "wait_time_total": 0.0,
+            "wait_time_max": 0.0,
+            "timeouts": 0,
+            "health_check_failures": 0,
+        }
+
+    # ------------------------------------------------------------------
+    # Checkout / return
+    # ------------------------------------------------------------------
+    def acquire(self, timeout=None):
+        timeout = self.acquire_timeout if timeout is None else timeout
+        started = time.monotonic()
+        waited = False
+
+        while True:
+            slot = None
+            open_new = False
+            with self._cond:
+                if self._closed:
+                    raise PoolTimeout("connection pool is closed")
+                self._evict_idle_locked()
+                while not self._idle and self._size_locked() >= self.max_size:
+                    remaining = timeout - (time.monotonic() - started)
+                    if remaining <= 0:
+                        self._stats["timeouts"] += 1
+                        raise PoolTimeout(f"no database connection available after {timeout:.1f}s")
+                    waited = True
+                    self._cond.wait(remaining)
+                if self._idle:
+                    slot = self._idle.pop()
+                else:
+                    self._opening += 1
+                    open_new = True
+
+            if open_new:
+                try:
+                    slot = _Slot(self._factory())
+                except Exception:
+                    with self._cond:
+                        self._opening -= 1
+                        self._cond.notify()
+                    raise
+                with self._cond:
+                    self._opening -= 1
+                    self._stats["created"] += 1
+            elif not self._is_healthy(slot):
+                self._close_raw(slot.conn)
+                with self._cond:
+                    self._stats["recycled"] += 1
+                    self._stats["health_check_failures"] += 1
+                    self._cond.notify()
+                continue
+
+            with self._cond:
+                self._in_use[id(slot.conn)] = slot
+                self._stats["checkouts"] += 1
+                if waited:
+                    wait_time = time.monotonic() - started
+                    self._stats["waits"] += 1
+                    self._stats["wait_time_total"] += wait_time
+                    self._stats["wait_time_max"] = max(self._stats["wait_time_max"], wait_time)
+            return PooledConnection(self, slot.conn)
+
+    def release(self, raw, discard=False):
+        with self._cond:
+            slot = self._in_use.pop(id(raw), None)
+        if slot is None:
+            return
+
+        if not discard:
+            discard = self._reset(raw)
+        now = time.monotonic()
+        if not discard and self.max_lifetime and now - slot.created_at > self.max_lifetime:
+            discard = True
+
+        if discard or self._closed:
+            self._close_raw(raw)
+            with self._cond:
+                self._stats["recycled"] += 1
+                self._cond.notify()
+            return
+
+        slot.last_used = now
+        with self._cond:
+            self._idle.append(slot)
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self, timeout=None):
+        """Check out a connection and always return it, even on error."""
+        conn = self.acquire(timeout)
+        try:
+            yield conn
+        except (pymysql.err.OperationalError, pymysql.err.InterfaceError):
+            conn.close(discard=True)
+            raise
+        finally:
+            conn.close()
+
+    # ------------------------------------------------------------------
+    # Maintenance
+    # ------------------------------------------------------------------
+    def prefill(self):
+        """Open connections until the pool holds at least min_size."""
+        while True:
+            with self._cond:
+                if self._closed or self._size_locked() >= self.min_size:
+                    return
+                self._opening += 1
+            try:
+                slot = _Slot(self._factory())
+            finally:
+                with self._cond:
+                    self._opening -= 1
+            with self._cond:
+                self._stats["created"] += 1
+                self._idle.insert(0, slot)
+                self._cond.notify()
+
+    def evict_idle(self):
+        """Close idle connections past their idle timeout or lifetime."""
+        with self._cond:
+            self._evict_idle_locked()
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._cond.notify_all()
+        for slot in idle:
+            self._close_raw(slot.conn)
+
+    def metrics(self):
+        with self._cond:
+            data = dict(self._stats)
+            data.update({
+                "in_use": len(self._in_use),
+                "idle": len(self._idle),
+                "size": self._size_locked(),
+                "min_size": self.min_size,
+                "max_size": self.max_size,
+            })
+        data["wait_time_avg"] = data["wait_time_total"] / data["waits"] if data["waits"] else 0.0
+        return data
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+    def _size_locked(self):
+        return len(self._idle) + len(self._in_use) + self._opening
+
+    def _evict_idle_locked(self):
+        now = time.monotonic()
+        size = self._size_locked()
+        keep = []
+        evicted = []
+        # _idle is a LIFO stack: walk it least-recently-used first.
+        for slot in self._idle:
+            expired = self.max_lifetime and now - slot.created_at > self.max_lifetime
+            stale = self.idle_timeout and now - slot.last_used > self.idle_timeout and size > self.min_size
+            if expired or stale:
+                evicted.append(slot)
+                size -= 1
+            else:
+                keep.append(slot)
+        if evicted:
+            self._idle = keep
+            self._stats["recycled"] += len(evicted)
+            for slot in evicted:
+                self._close_raw(slot.conn)
+
+    def _is_healthy(self, slot):
+        if not self.ping_interval or time.monotonic() - slot.last_used < self.ping_interval:
+            return True
+        try:
+            slot.conn.ping(reconnect=False)
+            return True
+        except Exception as e:
+            logger.warning(f"Discarding unhealthy pooled connection: {e}")
+            return False
+
+    @staticmethod
+    def _reset(raw):
+        """Roll back any transaction left open; returns True if the connection is broken."""
+        try:
+            if getattr(raw, "server_status", 0) & SERVER_STATUS.SERVER_STATUS_IN_TRANS:
+                raw.rollback()
+            return False
+        except Exception:
+            return True
+
+    @staticmethod
+    def _close_raw(raw):
+        try:
+            raw.close()
+        except Exception:
+            pass
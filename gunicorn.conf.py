@@ -0,0 +1,39 @@
+"""gunicorn settings for the Socket.IO backend (see wsgi.py).
+
+One green-thread worker holds thousands of idle dashboard sockets. To run
+more than one (WEB_CONCURRENCY > 1 here, or several hosts):
+
+- set SOCKETIO_MESSAGE_QUEUE (e.g. redis://redis:6379/0) so a broadcast
+  from any worker reaches the clients of every worker; only the worker
+  holding the MySQL leader lock publishes the periodic stats;
+- put a sticky load balancer in front. A Socket.IO session, and every
+  long-polling request of it, must reach the process that created it.
+  gunicorn's own socket does not do that, so run one single-worker
+  gunicorn per port and balance across them with cookie or ip-hash
+  affinity (nginx ``ip_hash``, HAProxy ``cookie SERVERID insert`` /
+  ``balance source``, an ALB with stickiness on). Clients that only use
+  the ``websocket`` transport need no affinity: the upgrade is a single
+  long-lived connection;
+- the write-behind journal (INGEST_CONFIG) is a file per process: give
+  each instance its own INGEST_JOURNAL path or leave write-behind off.
+"""
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+
+_async_mode = os.environ.setdefault("ASYNC_MODE", "eventlet")
+if _async_mode == "gevent":
+    worker_class = "geventwebsocket.gunicorn.workers.GeventWebSocketWorker"
+else:
+    worker_class = "eventlet"
+
+# Keep 1 unless clients are websocket-only (see above): gunicorn balances new
+# connections across workers without affinity
+workers = int(os.environ.get("WEB_CONCURRENCY", "1"))
+# Concurrent green threads (one per open socket or in-flight request) per worker
+worker_connections = int(os.environ.get("WORKER_CONNECTIONS", "10000"))
+# Long-polling and WebSocket requests stay open well past the default 30s
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", "120"))
+keepalive = 5
+graceful_timeout = 30
+accesslog = "-"
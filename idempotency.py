@@ -0,0 +1,92 @@
+"""Duplicate suppression for inspection ingest, and collision-free pcb_ids.
+
+Clients send an ``Idempotency-Key`` header (single POST) or an
+``idempotency_key`` field per item (bulk). The key is stored in the
+inspection's unique ``idempotency_key`` column, so a retry can never
+insert the board twice, even after a restart or on another worker. The
+bounded in-memory index answers recent retries without a database round
+trip.
+"""
+from collections import OrderedDict
+import itertools
+import os
+import re
+import secrets
+import threading
+import time
+
+KEY_PATTERN = re.compile(r"^[\x21-\x7e]{1,64}$")  # printable ASCII, fits VARCHAR(64)
+
+
+def validate_key(key):
+    """The key itself, or None when absent; ValueError when malformed."""
+    if key is None or key == "":
+        return None
+    if not isinstance(key, str) or not KEY_PATTERN.match(key):
+        raise ValueError("invalid idempotency key (1-64 printable ASCII characters)")
+    return key
+
+
+def new_key():
+    """Server-side key for queued items sent without one, so a journal replay cannot duplicate them."""
+    return f"srv-{secrets.token_hex(16)}"
+
+
+class IdempotencyIndex:
+    """Key -> result of the request that used it, least recently used evicted first."""
+
+    def __init__(self, max_entries=50000):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            result = self._entries.get(key)
+            if result is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return result
+
+    def put(self, key, result):
+        with self._lock:
+            self._entries[key] = result
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def metrics(self):
+        with self._lock:
+            return {"entries": len(self._entries), "max_entries": self.max_entries,
+                    "hits": self.hits, "misses": self.misses}
+
+
+class PcbIdGenerator:
+    """``PCB-<unix seconds>-<process token>-<counter>``: unique without any coordination.
+
+    The token is redrawn after a fork, so gunicorn workers never share one.
+    """
+
+    def __init__(self, prefix="PCB"):
+        self.prefix = prefix
+        self._pid = None
+        self._token = None
+        self._counter = None
+        self._lock = threading.Lock()
+
+    def _reset(self):
+        with self._lock:
+            if self._pid != os.getpid():
+                self._token = secrets.token_hex(3)
+                self._counter = itertools.count(1)
+                self._pid = os.getpid()
+
+    def __call__(self):
+        if self._pid != os.getpid():
+            self._reset()
+        # next() on itertools.count is atomic under the GIL
+        return f"{self.prefix}-{int(time.time())}-{self._token}-{next(self._counter):06d}"
@@ -0,0 +1,213 @@
+"""Content-addressed storage for inspection images, plus a thumbnail cache.
+
+Uploads are streamed to disk while being hashed and stored once under their
+SHA-256 (``<root>/ab/cd/<sha256>.<ext>``), so the same board image sent
+twice costs no extra space. Their names never change meaning, so they can
+be served with immutable cache headers. Thumbnails are generated on first
+request (Pillow is optional) and kept in a size-bounded directory evicted
+in LRU order.
+"""
+from collections import OrderedDict
+import hashlib
+import logging
+import os
+import re
+import tempfile
+import threading
+
+try:
+    from PIL import Image
+except ImportError:  # optional: without Pillow, thumbnail requests get the original
+    Image = None
+
+logger = logging.getLogger(__name__)
+
+NAME_PATTERN = re.compile(r"^([0-9a-f]{64})\.(jpg|png|webp|gif|bmp)$")
+MIMETYPES = {"jpg": "image/jpeg", "png": "image/png", "webp": "image/webp", "gif": "image/gif", "bmp": "image/bmp"}
+CHUNK_SIZE = 64 * 1024
+
+
+class ImageTooLarge(ValueError):
+    pass
+
+
+def sniff_extension(head):
+    """File extension from the first bytes of an image, or None."""
+    if head.startswith(b"\xff\xd8\xff"):
+        return "jpg"
+    if head.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "png"
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "webp"
+    if head[:6] in (b"GIF87a", b"GIF89a"):
+        return "gif"
+    if head.startswith(b"BM"):
+        return "bmp"
+    return None
+
+
+def image_name(value):
+    """The stored name in an image_path value (bare name or URL), or None."""
+    if not value:
+        return None
+    name = str(value).rsplit("/", 1)[-1]
+    return name if NAME_PATTERN.match(name) else None
+
+
+class ImageStore:
+    def __init__(self, root, max_upload_bytes=20 * 1024 * 1024):
+        self.root = root
+        self.max_upload_bytes = max_upload_bytes
+        self.uploads = 0
+        self.deduplicated = 0
+
+    def path_for(self, name):
+        """Absolute path of a stored image; ValueError for anything that is not a stored name."""
+        if not NAME_PATTERN.match(name or ""):
+            raise ValueError(f"invalid image name: {name!r}")
+        return os.path.join(self.root, name[:2], name[2:4], name)
+
+    def save(self, stream):
+        """Store an image read from a file-like ``stream``; returns (name, size, created)."""
+        os.makedirs(self.root, exist_ok=True)
+        digest = hashlib.sha256()
+        size = 0
+        head = b""
+        fd, tmp_path = tempfile.mkstemp(dir=self.root, prefix=".upload-")
+        try:
+            with os.fdopen(fd, "wb") as output:
+                while True:
+                    chunk = stream.read(CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    size += len(chunk)
+                    if size > self.max_upload_bytes:
+                        raise ImageTooLarge(f"image larger than {self.max_upload_bytes} bytes")
+                    if len(head) < 16:
+                        head += chunk[:16 - len(head)]
+                    digest.update(chunk)
+                    output.write(chunk)
+            extension = sniff_extension(head)
+            if extension is None:
+                raise ValueError("unsupported image format (jpeg, png, webp, gif or bmp)")
+
+            name = f"{digest.hexdigest()}.{extension}"
+            path = self.path_for(name)
+            self.uploads += 1
+            if os.path.exists(path):
+                self.deduplicated += 1
+                return name, size, False
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(tmp_path, path)
+            tmp_path = None
+            return name, size, True
+        finally:
+            if tmp_path is not None and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def metrics(self):
+        return {"uploads": self.uploads, "deduplicated": self.deduplicated}
+
+
+class ThumbnailCache:
+    """Thumbnails on disk, generated once per (image, size), LRU-evicted above ``max_bytes``."""
+
+    def __init__(self, store, root, max_bytes=256 * 1024 * 1024, sizes=(128, 256, 512), quality=80):
+        self.store = store
+        self.root = root
+        self.max_bytes = max_bytes
+        self.sizes = tuple(sizes)
+        self.quality = quality
+        self._lock = threading.Lock()
+        self._generating = {}  # thumbnail name -> lock held while it is generated
+        self._entries = None   # thumbnail name -> size in bytes, least recently used first
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def available(self):
+        return Image is not None
+
+    def get(self, name, size):
+        """Path of the ``size`` px thumbnail of stored image ``name`` (generated if needed)."""
+        if size not in self.sizes:
+            raise ValueError(f"invalid thumbnail size: {size} ({', '.join(map(str, self.sizes))})")
+        source = self.store.path_for(name)
+        thumb_name = f"{name.split('.', 1)[0]}-{size}.jpg"
+        path = os.path.join(self.root, thumb_name)
+        with self._lock:
+            self._load_index()
+            if thumb_name in self._entries:
+                self._entries.move_to_end(thumb_name)
+                self.hits += 1
+                return path
+            self.misses += 1
+            key_lock = self._generating.setdefault(thumb_name, threading.Lock())
+        with key_lock:
+            # A concurrent request may have generated it while we waited
+            if not os.path.exists(path):
+                if not os.path.exists(source):
+                    raise FileNotFoundError(name)
+                self._generate(source, path, size)
+            with self._lock:
+                self._generating.pop(thumb_name, None)
+                if thumb_name not in self._entries:
+                    self._entries[thumb_name] = os.path.getsize(path)
+                    self._bytes += self._entries[thumb_name]
+                self._evict(keep=thumb_name)
+        return path
+
+    def _generate(self, source, path, size):
+        os.makedirs(self.root, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.root, prefix=".thumb-")
+        os.close(fd)
+        try:
+            with Image.open(source) as image:
+                image.thumbnail((size, size))
+                image.convert("RGB").save(tmp_path, "JPEG", quality=self.quality, optimize=True)
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def _load_index(self):
+        """Rebuild the LRU order from the directory (oldest access first) on first use."""
+        if self._entries is not None:
+            return
+        self._entries = OrderedDict()
+        if os.path.isdir(self.root):
+            found = []
+            for entry in os.scandir(self.root):
+                if entry.is_file() and not entry.name.startswith("."):
+                    stat = entry.stat()
+                    found.append((stat.st_atime, entry.name, stat.st_size))
+            for _, thumb_name, size in sorted(found):
+                self._entries[thumb_name] = size
+                self._bytes += size
+
+    def _evict(self, keep):
+        while self._bytes > self.max_bytes and len(self._entries) > 1:
+            thumb_name, size = next(iter(self._entries.items()))
+            if thumb_name == keep:
+                self._entries.move_to_end(thumb_name)
+                continue
+            del self._entries[thumb_name]
+            self._bytes -= size
+            self.evictions += 1
+            try:
+                os.remove(os.path.join(self.root, thumb_name))
+            except FileNotFoundError:
+                pass
+
+    def metrics(self):
+        with self._lock:
+            return {
+                "available": self.available,
+                "entries": len(self._entries or ()),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
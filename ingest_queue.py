@@ -0,0 +1,213 @@
+"""Write-behind queue for inspection ingest.
+
+Validated inspections are appended to a bounded in-memory queue (and,
+optionally, an append-only NDJSON journal) and written to MySQL by one
+background task in batched transactions. Request threads never wait on the
+database; when the queue is full they get ``QueueFull`` and answer 429.
+
+Journal format, one JSON object per line::
+
+    {"seq": 12, "item": {...}}   an accepted inspection
+    {"ack": 12}                  everything up to seq 12 is in the database
+
+On start, items after the last ack are queued again and the journal is
+compacted to just those items.
+"""
+from collections import deque
+import json
+import logging
+import math
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class QueueFull(Exception):
+    """The write-behind queue cannot take more items right now."""
+
+    def __init__(self, retry_after):
+        super().__init__(f"ingest queue full, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+def _json_default(value):
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+class IngestQueue:
+    """Bounded FIFO drained by ``writer(items)`` in batches.
+
+    ``writer`` must write the whole batch in one transaction and raise on
+    failure; a failed batch stays at the head of the queue and is retried
+    with exponential backoff. ``decode`` turns a journaled item back into
+    what ``writer`` expects.
+    """
+
+    def __init__(self, writer, max_size=10000, batch_size=500, flush_interval=0.2,
+                 journal_path=None, fsync=False, retry_delay=0.5, max_retry_delay=30.0,
+                 decode=None, start_task=None, sleep=time.sleep):
+        self.writer = writer
+        self.max_size = max_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.journal_path = journal_path
+        self.fsync = fsync
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        self.decode = decode or (lambda item: item)
+        self._start_task = start_task or self._start_thread
+        self._sleep = sleep
+
+        self._cond = threading.Condition()
+        self._items = deque()  # (seq, item)
+        self._seq = 0
+        self._journal = None
+        self._task = None
+        self._drain_rate = 0.0  # items/s, smoothed
+
+        self._stats = {"accepted": 0, "written": 0, "rejected": 0, "batches": 0,
+                       "failures": 0, "replayed": 0}
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+    def start(self):
+        """Replay the journal (if any) and start the background writer once."""
+        with self._cond:
+            if self._task is not None:
+                return
+            if self.journal_path:
+                self._replay_journal()
+            self._task = self._start_task(self._run)
+
+    @staticmethod
+    def _start_thread(target):
+        thread = threading.Thread(target=target, name="ingest-writer", daemon=True)
+        thread.start()
+        return thread
+
+    def _replay_journal(self):
+        pending = {}
+        acked = 0
+        if os.path.exists(self.journal_path):
+            with open(self.journal_path, encoding="utf-8") as journal:
+                for line in journal:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        # A torn last line from a crash mid-write
+                        logger.warning(f"Skipping corrupt journal line in {self.journal_path}")
+                        continue
+                    if "ack" in record:
+                        acked = max(acked, record["ack"])
+                    else:
+                        pending[record["seq"]] = record["item"]
+
+        replay = sorted((seq, item) for seq, item in pending.items() if seq > acked)
+        self._seq = max([acked] + list(pending))
+        self._items.extend((seq, self.decode(item)) for seq, item in replay)
+        self._stats["replayed"] += len(replay)
+
+        # Compact: rewrite the journal with only what is still unflushed
+        tmp_path = self.journal_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as journal:
+            for seq, item in replay:
+                journal.write(json.dumps({"seq": seq, "item": item}, default=_json_default) + "\n")
+            journal.flush()
+            os.fsync(journal.fileno())
+        os.replace(tmp_path, self.journal_path)
+        self._journal = open(self.journal_path, "a", encoding="utf-8")
+        if replay:
+            logger.info(f"♻️  Replaying {len(replay)} unflushed inspection(s) from {self.journal_path}")
+
+    # ------------------------------------------------------------------
+    # Producers
+    # ------------------------------------------------------------------
+    def submit(self, item):
+        return self.submit_many([item])[0]
+
+    def submit_many(self, items):
+        """Queue items atomically (all or none); returns their sequence numbers."""
+        if self._task is None:
+            self.start()
+        with self._cond:
+            if len(self._items) + len(items) > self.max_size:
+                self._stats["rejected"] += len(items)
+                raise QueueFull(self._retry_after())
+            seqs = []
+            lines = []
+            for item in items:
+                self._seq += 1
+                seqs.append(self._seq)
+                self._items.append((self._seq, item))
+                if self._journal:
+                    lines.append(json.dumps({"seq": self._seq, "item": item}, default=_json_default) + "\n")
+            if lines:
+                self._journal.write("".join(lines))
+                self._journal.flush()
+                if self.fsync:
+                    os.fsync(self._journal.fileno())
+            self._stats["accepted"] += len(items)
+            self._cond.notify()
+        return seqs
+
+    def _retry_after(self):
+        rate = self._drain_rate or self.batch_size / max(self.flush_interval, 0.01)
+        return max(1, math.ceil(len(self._items) / rate))
+
+    # ------------------------------------------------------------------
+    # Consumer
+    # ------------------------------------------------------------------
+    def _run(self):
+        delay = self.retry_delay
+        while True:
+            with self._cond:
+                while not self._items:
+                    self._cond.wait()
+                batch = [self._items[i] for i in range(min(self.batch_size, len(self._items)))]
+
+            started = time.monotonic()
+            try:
+                self.writer([item for _, item in batch])
+            except Exception as e:
+                self._stats["failures"] += 1
+                logger.error(f"Write-behind batch of {len(batch)} failed, retrying in {delay:.1f}s: {e}")
+                self._sleep(delay)
+                delay = min(delay * 2, self.max_retry_delay)
+                continue
+            delay = self.retry_delay
+
+            elapsed = max(time.monotonic() - started, 1e-3)
+            with self._cond:
+                for _ in batch:
+                    self._items.popleft()
+                self._stats["written"] += len(batch)
+                self._stats["batches"] += 1
+                self._drain_rate = 0.8 * self._drain_rate + 0.2 * (len(batch) / elapsed) if self._drain_rate else len(batch) / elapsed
+                if self._journal:
+                    self._journal.write(json.dumps({"ack": batch[-1][0]}) + "\n")
+                    self._journal.flush()
+                    if not self._items:
+                        # Nothing left to replay: start the journal over
+                        self._journal.seek(0)
+                        self._journal.truncate()
+                remaining = len(self._items)
+
+            if remaining < self.batch_size:
+                # Let a partial batch fill up a little before the next transaction
+                self._sleep(self.flush_interval)
+
+    def metrics(self):
+        with self._cond:
+            data = dict(self._stats)
+            data.update({
+                "queued": len(self._items),
+                "max_size": self.max_size,
+                "drain_rate": round(self._drain_rate, 1),
+                "journal": self.journal_path,
+            })
+        return data
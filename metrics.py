@@ -0,0 +1,206 @@
+"""In-process metrics exposed in the Prometheus text format on /metrics.
+
+Request latency, per-query DB time (by query fingerprint) and Socket.IO
+emit counts/fan-out time are recorded here; the module has no dependency on
+backend.py so the pool, the broadcaster and the cursors can all feed it.
+"""
+from functools import lru_cache
+import re
+import threading
+import time
+
+import pymysql.cursors
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=None):
+    pairs = list(zip(names, values)) + list(extra or [])
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+class _Metric:
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._values = {}
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels.get(name, "") for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            items = list(self._values.items())
+        for key, value in items:
+            yield self.name + "_total", _format_labels(self.labelnames, key), value
+
+
+class Gauge(_Metric):
+    """Value read from a callback at scrape time."""
+    kind = "gauge"
+
+    def __init__(self, name, documentation, callback, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self.callback = callback
+
+    def samples(self):
+        value = self.callback()
+        if isinstance(value, dict):
+            for key, item in value.items():
+                key = key if isinstance(key, tuple) else (key,)
+                yield self.name, _format_labels(self.labelnames, key), item
+        elif value is not None:
+            yield self.name, "", value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+        self._values = {}  # key -> [bucket counts..., sum, count]
+
+    def observe(self, value, **labels):
+        key = tuple(labels.get(name, "") for name in self.labelnames)
+        with self._lock:
+            data = self._values.get(key)
+            if data is None:
+                data = self._values[key] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    data[i] += 1
+                    break
+            data[-2] += value
+            data[-1] += 1
+
+    def samples(self):
+        with self._lock:
+            items = [(key, list(data)) for key, data in self._values.items()]
+        for key, data in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, data):
+                cumulative += count
+                yield self.name + "_bucket", _format_labels(self.labelnames, key, [("le", bound)]), cumulative
+            yield self.name + "_bucket", _format_labels(self.labelnames, key, [("le", "+Inf")]), data[-1]
+            yield self.name + "_sum", _format_labels(self.labelnames, key), data[-2]
+            yield self.name + "_count", _format_labels(self.labelnames, key), data[-1]
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, *args, **kwargs):
+        return self.register(Counter(*args, **kwargs))
+
+    def gauge(self, *args, **kwargs):
+        return self.register(Gauge(*args, **kwargs))
+
+    def histogram(self, *args, **kwargs):
+        return self.register(Histogram(*args, **kwargs))
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, labels, value in metric.samples():
+                lines.append(f"{name}{labels} {value}")
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+http_requests = registry.counter(
+    "pcb_http_requests", "HTTP requests served", ("method", "endpoint", "status"))
+http_request_duration = registry.histogram(
+    "pcb_http_request_duration_seconds", "HTTP request latency", ("method", "endpoint"))
+db_queries = registry.counter(
+    "pcb_db_queries", "SQL statements executed", ("fingerprint",))
+db_query_rows = registry.counter(
+    "pcb_db_query_rows", "Rows affected or returned by SQL statements", ("fingerprint",))
+db_query_duration = registry.histogram(
+    "pcb_db_query_duration_seconds", "SQL statement latency (execute only)", ("fingerprint",))
+socketio_emits = registry.counter(
+    "pcb_socketio_emits", "Socket.IO events emitted", ("event",))
+socketio_fanout_duration = registry.histogram(
+    "pcb_socketio_fanout_duration_seconds", "Time spent in socketio.emit per event", ("event",))
+socketio_handler_duration = registry.histogram(
+    "pcb_socketio_handler_duration_seconds", "Socket.IO event handler latency", ("event",))
+
+
+_LITERALS = re.compile(r"'(?:[^'\\]|\\.)*'|\b\d+(?:\.\d+)?\b")
+_VALUE_LISTS = re.compile(r"\(\s*(?:%s|\?)(?:\s*,\s*(?:%s|\?))*\s*\)(?:\s*,\s*\(\s*(?:%s|\?)(?:\s*,\s*(?:%s|\?))*\s*\))*")
+_WHITESPACE = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=512)
+def fingerprint(sql):
+    """Normalize a statement so all executions of the same query share one label."""
+    text = _LITERALS.sub("?", sql)
+    text = _VALUE_LISTS.sub("(...)", text)
+    text = _WHITESPACE.sub(" ", text).strip()
+    return text[:160]
+
+
+def observe_query(sql, duration, rows):
+    label = fingerprint(sql)
+    db_queries.inc(fingerprint=label)
+    db_query_duration.observe(duration, fingerprint=label)
+    if rows and rows > 0:
+        db_query_rows.inc(rows, fingerprint=label)
+
+
+class _TimedCursorMixin:
+    """Times execute/executemany; the label uses the statement before parameter binding."""
+
+    _in_executemany = False
+
+    def execute(self, query, args=None):
+        if self._in_executemany:
+            # pymysql's executemany calls execute per chunk/row; time the whole call once
+            return super().execute(query, args)
+        started = time.perf_counter()
+        try:
+            return super().execute(query, args)
+        finally:
+            observe_query(query, time.perf_counter() - started, self.rowcount)
+
+    def executemany(self, query, args):
+        started = time.perf_counter()
+        self._in_executemany = True
+        try:
+            return super().executemany(query, args)
+        finally:
+            self._in_executemany = False
+            observe_query(query, time.perf_counter() - started, self.rowcount)
+
+
+class TimedDictCursor(_TimedCursorMixin, pymysql.cursors.DictCursor):
+    pass
+
+
+class TimedSSDictCursor(_TimedCursorMixin, pymysql.cursors.SSDictCursor):
+    pass
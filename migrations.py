@@ -0,0 +1,305 @@
+"""Versioned schema migrations.
+
+Each migration runs once and is recorded in ``schema_version``; apply the
+pending ones with ``flask --app backend migrate``. The server itself only
+reads the current version at startup and refuses to run against an older
+schema, it never issues DDL.
+
+MySQL commits DDL implicitly, so a migration cannot be rolled back as a
+whole: every step is written to be safe to re-run after a partial failure
+(IF NOT EXISTS, index lookups, INSERT IGNORE).
+
+The backend talks to MySQL through pymysql with hand-written SQL and has no
+SQLAlchemy models, which Flask-Migrate/Alembic need; this keeps migrations
+in the same style as the queries.
+"""
+import logging
+
+from rollups import ROLLUP_TABLES_DDL, defect_entries
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_VERSION_DDL = """
+    CREATE TABLE IF NOT EXISTS schema_version (
+        version INT PRIMARY KEY,
+        description VARCHAR(255) NOT NULL,
+        applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+"""
+
+ALERT_LEVELS = ("info", "warning", "critical")
+
+MIGRATIONS = []  # (version, description, apply(cursor)), in version order
+
+
+class SchemaOutOfDate(Exception):
+    def __init__(self, current, expected):
+        super().__init__(f"database schema is at version {current}, this code needs {expected} "
+                         f"(run: flask --app backend migrate)")
+        self.current = current
+        self.expected = expected
+
+
+def migration(version, description):
+    def register(apply):
+        assert not MIGRATIONS or MIGRATIONS[-1][0] < version, "migrations must be declared in order"
+        MIGRATIONS.append((version, description, apply))
+        return apply
+    return register
+
+
+INSERT_DEFECTS_SQL = (
+    "INSERT INTO inspection_defects (inspection_id, position, defect_type, severity) "
+    "VALUES (%s, %s, %s, %s)"
+)
+
+
+def defect_rows(inspections):
+    """inspection_defects values for rows carrying ``id`` and ``defects``."""
+    values = []
+    for inspection in inspections:
+        for position, (defect_type, severity) in enumerate(defect_entries(inspection.get("defects"))):
+            values.append((inspection["id"], position, defect_type, severity))
+    return values
+
+
+def ensure_index(cursor, table, name, columns, unique=False):
+    """CREATE INDEX unless it already exists (MySQL has no IF NOT EXISTS here)"""
+    cursor.execute("""
+        SELECT 1 FROM information_schema.statistics
+        WHERE table_schema = DATABASE() AND table_name = %s AND index_name = %s
+        LIMIT 1
+    """, (table, name))
+    if not cursor.fetchone():
+        cursor.execute(f"CREATE {'UNIQUE ' if unique else ''}INDEX {name} ON {table} ({columns})")
+        logger.info(f"✅ Index {name} created on {table}")
+
+
+# -----------------------------------------------------------
+# Migrations
+# -----------------------------------------------------------
+@migration(1, "Baseline tables and reference data")
+def _baseline(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS inspections (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            pcb_id VARCHAR(50),
+            status ENUM('passed','failed') NOT NULL,
+            defects JSON,
+            operator VARCHAR(100),
+            station VARCHAR(100),
+            components TEXT,
+            microbe_count INT DEFAULT 0,
+            image_path VARCHAR(255),
+            confidence FLOAT DEFAULT 0.0,
+            processing_time FLOAT DEFAULT 0.0,
+            timestamp DATETIME,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS alerts (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            message TEXT,
+            level VARCHAR(20),
+            ack BOOLEAN DEFAULT FALSE,
+            created_at DATETIME
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS operators (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            name VARCHAR(100) NOT NULL,
+            shift VARCHAR(50) NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS stations (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            name VARCHAR(100) NOT NULL,
+            line VARCHAR(50) NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    # Reference data (formerly seeded by init_db.sql), only into empty tables
+    cursor.execute("SELECT COUNT(*) AS count FROM operators")
+    if not cursor.fetchone()["count"]:
+        cursor.executemany("INSERT INTO operators (name, shift) VALUES (%s, %s)",
+                           [("Alice", "Morning"), ("Bob", "Evening"), ("Charlie", "Night")])
+    cursor.execute("SELECT COUNT(*) AS count FROM stations")
+    if not cursor.fetchone()["count"]:
+        cursor.executemany("INSERT INTO stations (name, line) VALUES (%s, %s)",
+                           [("Station A", "Line 1"), ("Station B", "Line 1"), ("Station C", "Line 2")])
+
+
+@migration(2, "Indexes for the inspections listing, filters and keyset pagination")
+def _inspection_indexes(cursor):
+    ensure_index(cursor, "inspections", "idx_inspections_ts_id", "timestamp, id")
+    ensure_index(cursor, "inspections", "idx_inspections_station_ts", "station, timestamp, id")
+    ensure_index(cursor, "inspections", "idx_inspections_operator_ts", "operator, timestamp, id")
+    ensure_index(cursor, "inspections", "idx_inspections_status_ts", "status, timestamp, id")
+
+
+@migration(3, "Rollup tables")
+def _rollup_tables(cursor):
+    for ddl in ROLLUP_TABLES_DDL:
+        cursor.execute(ddl)
+
+
+@migration(4, "Align alerts columns (typed level, NOT NULL message, defaulted created_at)")
+def _align_alerts(cursor):
+    levels = ", ".join(f"'{level}'" for level in ALERT_LEVELS)
+    cursor.execute(f"UPDATE alerts SET level = 'info' WHERE level IS NULL OR level NOT IN ({levels})")
+    cursor.execute("UPDATE alerts SET message = '' WHERE message IS NULL")
+    cursor.execute("UPDATE alerts SET created_at = NOW() WHERE created_at IS NULL")
+    cursor.execute(f"""
+        ALTER TABLE alerts
+            MODIFY message TEXT NOT NULL,
+            MODIFY level ENUM({levels}) NOT NULL DEFAULT 'info',
+            MODIFY created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+    """)
+
+
+@migration(5, "inspection_defects child table, backfilled from the defects JSON")
+def _inspection_defects(cursor, batch_size=5000):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS inspection_defects (
+            inspection_id INT NOT NULL,
+            position SMALLINT NOT NULL,
+            defect_type VARCHAR(100) NOT NULL,
+            severity VARCHAR(50),
+            PRIMARY KEY (inspection_id, position),
+            INDEX idx_inspection_defects_type (defect_type, inspection_id),
+            CONSTRAINT fk_inspection_defects_inspection
+                FOREIGN KEY (inspection_id) REFERENCES inspections (id) ON DELETE CASCADE
+        )
+    """)
+    last_id, copied = 0, 0
+    while True:
+        cursor.execute("""
+            SELECT id, defects FROM inspections
+            WHERE id > %s
+            ORDER BY id LIMIT %s
+        """, (last_id, batch_size))
+        rows = cursor.fetchall()
+        if not rows:
+            break
+        values = defect_rows(rows)
+        if values:
+            # IGNORE: rows copied before an interrupted run are already there
+            cursor.executemany("INSERT IGNORE" + INSERT_DEFECTS_SQL[len("INSERT"):], values)
+            copied += len(values)
+        last_id = rows[-1]["id"]
+    logger.info(f"✅ {copied} defects copied to inspection_defects")
+
+
+@migration(6, "Archive tables: inspections_archive, archive_totals, archive_files")
+def _archive_tables(cursor):
+    # Same columns as inspections; ids are kept, so no AUTO_INCREMENT
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS inspections_archive (
+            id INT PRIMARY KEY,
+            pcb_id VARCHAR(50),
+            status ENUM('passed','failed') NOT NULL,
+            defects JSON,
+            operator VARCHAR(100),
+            station VARCHAR(100),
+            components TEXT,
+            microbe_count INT DEFAULT 0,
+            image_path VARCHAR(255),
+            confidence FLOAT DEFAULT 0.0,
+            processing_time FLOAT DEFAULT 0.0,
+            timestamp DATETIME,
+            created_at TIMESTAMP NULL,
+            archived_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            INDEX idx_inspections_archive_ts_id (timestamp, id),
+            INDEX idx_inspections_archive_station_ts (station, timestamp, id)
+        )
+    """)
+    # Per-station sums of everything archived (table or files), read by the stats seed
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS archive_totals (
+            station VARCHAR(100) NOT NULL PRIMARY KEY,
+            total BIGINT NOT NULL DEFAULT 0,
+            passed BIGINT NOT NULL DEFAULT 0,
+            failed BIGINT NOT NULL DEFAULT 0,
+            pt_sum DOUBLE NOT NULL DEFAULT 0,
+            pt_count BIGINT NOT NULL DEFAULT 0,
+            conf_sum DOUBLE NOT NULL DEFAULT 0,
+            conf_count BIGINT NOT NULL DEFAULT 0
+        )
+    """)
+    # Index of the compressed NDJSON files written in "files" mode
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS archive_files (
+            name VARCHAR(255) NOT NULL PRIMARY KEY,
+            first_id INT NOT NULL,
+            last_id INT NOT NULL,
+            min_timestamp DATETIME,
+            max_timestamp DATETIME,
+            row_count INT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            INDEX idx_archive_files_ts (min_timestamp, max_timestamp)
+        )
+    """)
+
+
+
+@migration(7, "Unique idempotency_key on inspections")
+def _idempotency_key(cursor):
+    cursor.execute("""
+        SELECT 1 FROM information_schema.columns
+        WHERE table_schema = DATABASE() AND table_name = 'inspections' AND column_name = 'idempotency_key'
+    """)
+    if not cursor.fetchone():
+        # NULL for rows inserted without a key: a unique index allows any number of NULLs
+        cursor.execute("ALTER TABLE inspections ADD COLUMN idempotency_key VARCHAR(64) NULL")
+    ensure_index(cursor, "inspections", "uq_inspections_idempotency_key", "idempotency_key", unique=True)
+
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+# -----------------------------------------------------------
+# Runner
+# -----------------------------------------------------------
+def current_version(cursor):
+    cursor.execute("""
+        SELECT 1 FROM information_schema.tables
+        WHERE table_schema = DATABASE() AND table_name = 'schema_version'
+    """)
+    if not cursor.fetchone():
+        return 0
+    cursor.execute("SELECT COALESCE(MAX(version), 0) AS version FROM schema_version")
+    return int(cursor.fetchone()["version"])
+
+
+def check(conn):
+    """Raise SchemaOutOfDate unless every migration has been applied; returns the version."""
+    with conn.cursor() as cursor:
+        version = current_version(cursor)
+    if version < LATEST_VERSION:
+        raise SchemaOutOfDate(version, LATEST_VERSION)
+    return version
+
+
+def migrate(conn, target=None):
+    """Apply pending migrations up to ``target`` (default: all); returns the versions applied."""
+    target = LATEST_VERSION if target is None else target
+    applied = []
+    with conn.cursor() as cursor:
+        cursor.execute(SCHEMA_VERSION_DDL)
+        version = current_version(cursor)
+        for number, description, apply in MIGRATIONS:
+            if number <= version or number > target:
+                continue
+            logger.info(f"🔧 Migration {number}: {description}")
+            apply(cursor)
+            cursor.execute("INSERT INTO schema_version (version, description) VALUES (%s, %s)",
+                           (number, description))
+            conn.commit()
+            applied.append(number)
+    if not applied:
+        logger.info(f"✅ Schema up to date (version {version})")
+    return applied
@@ -0,0 +1,17 @@
+"""Client for the PCB inspection backend, for the desktop inspection app.
+
+    from pcb_client import InspectionClient
+
+    client = InspectionClient("https://backend.example", station="Station A", operator="Alice")
+    client.submit({"pcb_id": "PCB-001", "status": "passed", "confidence": 98.2})
+    ...
+    client.close()
+
+Inspections are spooled in SQLite first and sent in batches in the
+background, so ``submit`` returns in well under a millisecond whether or not
+the backend is reachable. Dependencies: pcb_client/requirements.txt.
+"""
+from pcb_client.client import InspectionClient
+from pcb_client.spool import Spool
+
+__all__ = ["InspectionClient", "Spool"]
@@ -0,0 +1,259 @@
+"""Store-and-forward client for the inspection backend."""
+import json
+import logging
+import random
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+try:
+    import socketio
+except ImportError:  # optional: without python-socketio there is no live connection, ingest still works
+    socketio = None
+
+from pcb_client.spool import Spool
+
+logger = logging.getLogger(__name__)
+
+BULK_PATH = "/api/inspections/bulk"
+RETRY_STATUSES = (429, 502, 503, 504)
+
+
+class InspectionClient:
+    """Spools inspections locally and ships them to the backend in batches.
+
+    ``submit`` only appends to the SQLite spool and returns; one background
+    thread drains the spool to the bulk endpoint over a keep-alive session,
+    as NDJSON, each item carrying its idempotency key. Network or server
+    failures back off exponentially (honouring Retry-After) and leave the
+    items spooled, so the station keeps inspecting while the backend or its
+    database is away.
+
+    With python-socketio installed, a Socket.IO connection announces the
+    station (``desktop_app_connected``), receives the station's alerts and
+    triggers an immediate flush whenever the backend comes back.
+    """
+
+    def __init__(self, base_url, spool_path="pcb_spool.db", station=None, operator=None,
+                 batch_size=200, linger=0.2, timeout=10.0, backoff_base=0.5, max_backoff=60.0,
+                 live=True, on_alert=None, on_status=None, synchronous="NORMAL"):
+        self.base_url = base_url.rstrip("/")
+        self.station = station
+        self.operator = operator
+        self.batch_size = batch_size
+        self.max_batch_size = batch_size
+        self.linger = linger          # seconds to let a partial batch fill up
+        self.timeout = timeout
+        self.backoff_base = backoff_base
+        self.max_backoff = max_backoff
+        self.on_alert = on_alert      # callback(alert dict) for new-alert events
+        self.on_status = on_status    # callback(desktop_status dict)
+
+        self.spool = Spool(spool_path, synchronous=synchronous)
+        self.session = requests.Session()
+        # One connection is enough for one flusher; keep it alive between batches
+        self.session.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=2))
+        self.session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=2))
+
+        self._wakeup = threading.Event()  # something was spooled
+        self._resume = threading.Event()  # cut a backoff short: backend back, or closing
+        self._stop = threading.Event()
+        self._failures = 0
+        self._stats = {"submitted": 0, "sent": 0, "replayed": 0, "rejected": 0, "batches": 0,
+                       "failures": 0, "last_error": None, "last_flush": None}
+        self._flusher = threading.Thread(target=self._run, name="pcb-client-flush", daemon=True)
+        self._flusher.start()
+
+        self.sio = None
+        if live and socketio is not None:
+            self._start_live()
+        elif live:
+            logger.info("python-socketio not installed: no live connection to the backend")
+
+    # ------------------------------------------------------------------
+    # Producer side (UI thread)
+    # ------------------------------------------------------------------
+    def submit(self, inspection):
+        """Spool one inspection; returns its idempotency key. Never waits on the network."""
+        return self.submit_many([inspection])[0]
+
+    def submit_many(self, inspections):
+        inspections = [self._with_defaults(inspection) for inspection in inspections]
+        keys = self.spool.put_many(inspections)
+        self._stats["submitted"] += len(keys)
+        self._wakeup.set()
+        return keys
+
+    def _with_defaults(self, inspection):
+        inspection = dict(inspection)
+        if self.station and not inspection.get("station"):
+            inspection["station"] = self.station
+        if self.operator and not inspection.get("operator"):
+            inspection["operator"] = self.operator
+        return inspection
+
+    # ------------------------------------------------------------------
+    # Flusher
+    # ------------------------------------------------------------------
+    def _run(self):
+        while not self._stop.is_set():
+            batch = self.spool.peek(self.batch_size)
+            if not batch:
+                self._wakeup.wait()
+                self._wakeup.clear()
+                continue
+            if len(batch) < self.batch_size and self.linger:
+                # Let a partial batch fill up; an unbatched trickle is what we want to avoid
+                self._stop.wait(self.linger)
+                batch = self.spool.peek(self.batch_size)
+
+            try:
+                delay = self._send(batch)
+            except requests.RequestException as e:
+                delay = self._failed(f"{type(e).__name__}: {e}")
+            if delay:
+                # New boards do not cut the wait short, a reconnect (or close) does
+                self._resume.clear()
+                self._resume.wait(delay)
+
+    def _send(self, batch):
+        """POST one batch; returns seconds to wait before the next attempt (0 on success)."""
+        body = "\n".join(json.dumps(dict(inspection, idempotency_key=key), default=str)
+                         for _, key, inspection in batch)
+        self.spool.mark_attempt([seq for seq, _, _ in batch])
+        response = self.session.post(self.base_url + BULK_PATH, data=body.encode("utf-8"),
+                                     headers={"Content-Type": "application/x-ndjson"}, timeout=self.timeout)
+
+        if response.status_code == 413:
+            # The backend takes fewer items per request than we send
+            self.batch_size = max(1, self.batch_size // 2)
+            logger.warning(f"Bulk batch too large, sending {self.batch_size} per request")
+            return 0
+        if response.status_code in RETRY_STATUSES:
+            return self._failed(f"HTTP {response.status_code}", response.headers.get("Retry-After"))
+
+        results = None
+        if response.status_code in (200, 202, 400):
+            try:
+                results = response.json().get("results")
+            except ValueError:
+                pass
+        if not isinstance(results, list) or len(results) != len(batch):
+            return self._failed(f"HTTP {response.status_code}: {response.text[:200]}")
+
+        acked, rejected = [], []
+        for (seq, _, _), result in zip(batch, results):
+            if result and result.get("error"):
+                rejected.append((seq, result["error"]))
+            else:
+                acked.append(seq)
+                if result and result.get("replayed"):
+                    self._stats["replayed"] += 1
+        if rejected:
+            self.spool.reject(rejected)
+            logger.warning(f"{len(rejected)} inspection(s) rejected by the backend: {rejected[0][1]}")
+        self.spool.ack(acked)
+
+        self._failures = 0
+        self.batch_size = min(self.max_batch_size, self.batch_size * 2)
+        self._stats["sent"] += len(acked)
+        self._stats["rejected"] += len(rejected)
+        self._stats["batches"] += 1
+        self._stats["last_flush"] = time.time()
+        return 0
+
+    def _failed(self, error, retry_after=None):
+        self._failures += 1
+        self._stats["failures"] += 1
+        self._stats["last_error"] = error
+        try:
+            delay = float(retry_after) if retry_after is not None else None
+        except ValueError:
+            delay = None
+        if delay is None:
+            # Full jitter, so a line of stations coming back does not retry in lockstep
+            delay = random.uniform(0, min(self.max_backoff, self.backoff_base * 2 ** self._failures))
+        logger.warning(f"Flush failed ({error}), {len(self.spool)} spooled, retrying in {delay:.1f}s")
+        return delay
+
+    def flush(self, timeout=10.0):
+        """Wait until the spool is empty (True) or ``timeout`` expires (False)."""
+        deadline = time.monotonic() + timeout
+        self._resume.set()
+        self._wakeup.set()
+        while len(self.spool):
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(0.05)
+        return True
+
+    # ------------------------------------------------------------------
+    # Live connection
+    # ------------------------------------------------------------------
+    def _start_live(self):
+        self.sio = socketio.Client(reconnection=True, reconnection_delay_max=self.max_backoff, logger=False)
+        self.sio.on("connect", self._on_connect)
+        if self.on_alert is not None:
+            self.sio.on("new-alert", self.on_alert)
+        if self.on_status is not None:
+            self.sio.on("desktop_status", self.on_status)
+        threading.Thread(target=self._connect_live, name="pcb-client-live", daemon=True).start()
+
+    def _connect_live(self):
+        # Subscribe to this station's room only: the dashboards' broadcast stream is not needed here
+        url = self.base_url + (f"?stations={requests.utils.quote(self.station)}" if self.station else "")
+        failures = 0
+        while not self._stop.is_set():
+            try:
+                # Starts on long-polling and upgrades to WebSocket when websocket-client is installed
+                self.sio.connect(url, wait_timeout=self.timeout)
+                return  # python-socketio reconnects by itself from here on
+            except Exception as e:
+                failures += 1
+                delay = random.uniform(0, min(self.max_backoff, self.backoff_base * 2 ** failures))
+                logger.info(f"Live connection unavailable ({e}), retrying in {delay:.1f}s")
+                self._stop.wait(delay)
+
+    def _on_connect(self):
+        self.sio.emit("desktop_app_connected", {
+            "station": self.station,
+            "operator": self.operator,
+            "spooled": len(self.spool),
+        })
+        # The backend is reachable again: do not sit out the rest of a backoff
+        self._failures = 0
+        self._resume.set()
+        self._wakeup.set()
+
+    # ------------------------------------------------------------------
+    def stats(self):
+        data = dict(self._stats)
+        data.update({
+            "spooled": len(self.spool),
+            "oldest_spooled_age": round(self.spool.oldest_age(), 1),
+            "rejected_total": self.spool.rejected_count(),
+            "batch_size": self.batch_size,
+            "connected": bool(self.sio and self.sio.connected),
+        })
+        return data
+
+    def close(self, flush_timeout=5.0):
+        """Try to empty the spool, then stop. Whatever is left is sent on the next start."""
+        if flush_timeout:
+            self.flush(flush_timeout)
+        self._stop.set()
+        self._resume.set()
+        self._wakeup.set()
+        self._flusher.join(timeout=self.timeout)
+        if self.sio is not None and self.sio.connected:
+            self.sio.disconnect()
+        self.session.close()
+        self.spool.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
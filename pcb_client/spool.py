@@ -0,0 +1,116 @@
+"""SQLite spool: inspections wait here until the backend has acknowledged them."""
+import json
+import sqlite3
+import threading
+import time
+import uuid
+
+
+class Spool:
+    """Durable FIFO of inspections, keyed by their idempotency key.
+
+    Items stay in the spool until ``ack``; a crash or a lost response only
+    means they are sent again, and the backend drops the duplicates by key.
+    Items the backend refuses as invalid move to the ``rejected`` table
+    instead of being retried forever.
+    """
+
+    def __init__(self, path, synchronous="NORMAL"):
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        # WAL: appends from the UI thread do not wait for the flusher's reads
+        self._db.execute("PRAGMA journal_mode=WAL")
+        # NORMAL survives an application crash; FULL also survives a power cut, at an fsync per board
+        self._db.execute(f"PRAGMA synchronous={synchronous}")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS spool (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                idempotency_key TEXT NOT NULL UNIQUE,
+                payload TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                created_at REAL NOT NULL
+            )
+        """)
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS rejected (
+                seq INTEGER PRIMARY KEY,
+                idempotency_key TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                error TEXT,
+                rejected_at REAL NOT NULL
+            )
+        """)
+
+    def put(self, inspection):
+        return self.put_many([inspection])[0]
+
+    def put_many(self, inspections):
+        """Append inspections in one transaction; returns their idempotency keys."""
+        rows = []
+        now = time.time()
+        for inspection in inspections:
+            key = inspection.get("idempotency_key") or uuid.uuid4().hex
+            payload = {k: v for k, v in inspection.items() if k != "idempotency_key"}
+            rows.append((key, json.dumps(payload, default=str), now))
+        with self._lock:
+            self._db.execute("BEGIN")
+            try:
+                # Re-spooling a key that is already waiting keeps the first copy
+                self._db.executemany(
+                    "INSERT OR IGNORE INTO spool (idempotency_key, payload, created_at) VALUES (?, ?, ?)", rows)
+                self._db.execute("COMMIT")
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise
+        return [key for key, _, _ in rows]
+
+    def peek(self, limit):
+        """The oldest ``limit`` items as (seq, idempotency_key, inspection)."""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT seq, idempotency_key, payload FROM spool ORDER BY seq LIMIT ?", (limit,)).fetchall()
+        return [(seq, key, json.loads(payload)) for seq, key, payload in rows]
+
+    def ack(self, seqs):
+        with self._lock:
+            self._db.executemany("DELETE FROM spool WHERE seq = ?", [(seq,) for seq in seqs])
+
+    def reject(self, items):
+        """Move (seq, error) items to the rejected table."""
+        now = time.time()
+        with self._lock:
+            self._db.execute("BEGIN")
+            try:
+                for seq, error in items:
+                    self._db.execute("""
+                        INSERT OR REPLACE INTO rejected (seq, idempotency_key, payload, error, rejected_at)
+                        SELECT seq, idempotency_key, payload, ?, ? FROM spool WHERE seq = ?
+                    """, (error, now, seq))
+                    self._db.execute("DELETE FROM spool WHERE seq = ?", (seq,))
+                self._db.execute("COMMIT")
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise
+
+    def mark_attempt(self, seqs):
+        with self._lock:
+            self._db.executemany("UPDATE spool SET attempts = attempts + 1 WHERE seq = ?", [(seq,) for seq in seqs])
+
+    def __len__(self):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM spool").fetchone()[0]
+
+    def rejected_count(self):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM rejected").fetchone()[0]
+
+    def oldest_age(self):
+        """Seconds the oldest waiting item has been in the spool (0 when empty)."""
+        with self._lock:
+            created_at = self._db.execute("SELECT MIN(created_at) FROM spool").fetchone()[0]
+        return time.time() - created_at if created_at else 0.0
+
+    def close(self):
+        with self._lock:
+            self._db.close()
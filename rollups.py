@@ -0,0 +1,379 @@
+"""Time-bucketed rollups of inspections for trend and per-station analytics.
+
+Every inspection inserted through the API is folded into minute, hour and
+day buckets keyed by (station, operator, status), plus per-defect-type
+counts. Deltas accumulate in memory and are upserted additively into
+``inspection_rollups`` / ``inspection_rollup_defects`` by a background task.
+Queries read the rollup tables for the requested range, and the deltas that
+have not been flushed yet are merged in. Their cost depends on the number of
+buckets, not on how many inspections exist.
+"""
+from collections import defaultdict
+from datetime import timedelta
+import itertools
+import json
+import logging
+import threading
+
+import pymysql
+
+logger = logging.getLogger(__name__)
+
+GRANULARITIES = {
+    "minute": timedelta(minutes=1),
+    "hour": timedelta(hours=1),
+    "day": timedelta(days=1),
+}
+
+ROLLUP_TABLES_DDL = (
+    """
+    CREATE TABLE IF NOT EXISTS inspection_rollups (
+        granularity ENUM('minute','hour','day') NOT NULL,
+        bucket_start DATETIME NOT NULL,
+        station VARCHAR(100) NOT NULL DEFAULT '',
+        operator VARCHAR(100) NOT NULL DEFAULT '',
+        status ENUM('passed','failed') NOT NULL,
+        count INT NOT NULL DEFAULT 0,
+        confidence_sum DOUBLE NOT NULL DEFAULT 0,
+        confidence_count INT NOT NULL DEFAULT 0,
+        processing_time_sum DOUBLE NOT NULL DEFAULT 0,
+        processing_time_count INT NOT NULL DEFAULT 0,
+        PRIMARY KEY (granularity, bucket_start, station, operator, status),
+        INDEX idx_rollups_station (granularity, station, bucket_start)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS inspection_rollup_defects (
+        granularity ENUM('minute','hour','day') NOT NULL,
+        bucket_start DATETIME NOT NULL,
+        station VARCHAR(100) NOT NULL DEFAULT '',
+        operator VARCHAR(100) NOT NULL DEFAULT '',
+        defect_type VARCHAR(100) NOT NULL,
+        count INT NOT NULL DEFAULT 0,
+        PRIMARY KEY (granularity, bucket_start, station, operator, defect_type)
+    )
+    """,
+)
+
+UPSERT_ROLLUP_SQL = """
+    INSERT INTO inspection_rollups
+        (granularity, bucket_start, station, operator, status, count,
+         confidence_sum, confidence_count, processing_time_sum, processing_time_count)
+    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+    ON DUPLICATE KEY UPDATE
+        count = count + VALUES(count),
+        confidence_sum = confidence_sum + VALUES(confidence_sum),
+        confidence_count = confidence_count + VALUES(confidence_count),
+        processing_time_sum = processing_time_sum + VALUES(processing_time_sum),
+        processing_time_count = processing_time_count + VALUES(processing_time_count)
+"""
+
+UPSERT_DEFECTS_SQL = """
+    INSERT INTO inspection_rollup_defects
+        (granularity, bucket_start, station, operator, defect_type, count)
+    VALUES (%s, %s, %s, %s, %s, %s)
+    ON DUPLICATE KEY UPDATE count = count + VALUES(count)
+"""
+
+
+def bucket_start(timestamp, granularity):
+    if granularity == "minute":
+        return timestamp.replace(second=0, microsecond=0)
+    if granularity == "hour":
+        return timestamp.replace(minute=0, second=0, microsecond=0)
+    return timestamp.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def defect_entries(defects):
+    """(type, severity) pairs from the stored defects JSON (string or list)."""
+    if isinstance(defects, str):
+        try:
+            defects = json.loads(defects) if defects else []
+        except ValueError:
+            return []
+    entries = []
+    for defect in defects or []:
+        if isinstance(defect, dict):
+            name, severity = defect.get("type"), defect.get("severity")
+        else:
+            name, severity = defect, None
+        if name:
+            entries.append((str(name)[:100], str(severity)[:50] if severity else None))
+    return entries
+
+
+def defect_types(defects):
+    """Defect type names from the stored defects JSON (string or list)."""
+    return [name for name, _ in defect_entries(defects)]
+
+
+class _Deltas:
+    """Additive rollup deltas: {(granularity, bucket, station, operator, status): [5 sums]}."""
+
+    def __init__(self):
+        self.rollups = defaultdict(lambda: [0, 0.0, 0, 0.0, 0])
+        self.defects = defaultdict(int)
+
+    def __bool__(self):
+        return bool(self.rollups or self.defects)
+
+    def add(self, row):
+        timestamp = row.get("timestamp")
+        if timestamp is None:
+            return
+        station = (row.get("station") or "")[:100]
+        operator = (row.get("operator") or "")[:100]
+        status = row.get("status")
+        confidence = float(row.get("confidence") or 0)
+        processing_time = float(row.get("processing_time") or 0)
+        types = defect_types(row.get("defects"))
+
+        for granularity in GRANULARITIES:
+            bucket = bucket_start(timestamp, granularity)
+            sums = self.rollups[(granularity, bucket, station, operator, status)]
+            sums[0] += 1
+            if confidence > 0:
+                sums[1] += confidence
+                sums[2] += 1
+            if processing_time > 0:
+                sums[3] += processing_time
+                sums[4] += 1
+            for defect_type in types:
+                self.defects[(granularity, bucket, station, operator, defect_type)] += 1
+
+    def merge(self, other):
+        for key, sums in other.rollups.items():
+            mine = self.rollups[key]
+            for i, value in enumerate(sums):
+                mine[i] += value
+        for key, count in other.defects.items():
+            self.defects[key] += count
+
+    def write(self, cursor):
+        if self.rollups:
+            cursor.executemany(UPSERT_ROLLUP_SQL, [key + tuple(sums) for key, sums in self.rollups.items()])
+        if self.defects:
+            cursor.executemany(UPSERT_DEFECTS_SQL, [key + (count,) for key, count in self.defects.items()])
+
+
+class RollupEngine:
+    """Accumulates rollup deltas on ingest and serves bucketed queries.
+
+    ``connection`` is a zero-argument callable returning a context manager
+    that yields a DB connection (``backend.db_connection``).
+    """
+
+    def __init__(self, connection, flush_interval=5.0, start_task=None, sleep=None):
+        self._connection = connection
+        self.flush_interval = flush_interval
+        self._start_task = start_task
+        self._sleep = sleep
+
+        self._lock = threading.Lock()
+        self._pending = _Deltas()
+        self._flushing = None  # deltas being written; still visible to queries
+        self._task = None
+        self.flushes = 0
+
+    # ------------------------------------------------------------------
+    # Ingest side
+    # ------------------------------------------------------------------
+    def record_many(self, rows):
+        """Fold inserted rows (normalized values with a datetime timestamp) into the deltas."""
+        with self._lock:
+            for row in rows:
+                self._pending.add(row)
+        if self._task is None and self._start_task is not None:
+            self._ensure_started()
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._task is None:
+                self._task = self._start_task(self._run)
+
+    def _run(self):
+        while True:
+            self._sleep(self.flush_interval)
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Error flushing rollups: {e}")
+
+    def flush(self):
+        """Upsert pending deltas; on failure they are kept for the next flush."""
+        with self._lock:
+            pending, self._pending = self._pending, _Deltas()
+            self._flushing = pending
+        if not pending:
+            return
+        try:
+            with self._connection() as conn, conn.cursor() as cursor:
+                conn.begin()
+                try:
+                    pending.write(cursor)
+                    conn.commit()
+                except Exception:
+                    conn.rollback()
+                    raise
+        except Exception:
+            with self._lock:
+                pending.merge(self._pending)
+                self._pending = pending
+                self._flushing = None
+            raise
+        with self._lock:
+            self._flushing = None
+        self.flushes += 1
+
+    # ------------------------------------------------------------------
+    # Query side
+    # ------------------------------------------------------------------
+    def _select(self, group_by, granularity, since, until, station=None, operator=None):
+        where = ["granularity = %s", "bucket_start >= %s", "bucket_start < %s"]
+        params = [granularity, since, until]
+        if station is not None:
+            where.append("station = %s")
+            params.append(station)
+        if operator is not None:
+            where.append("operator = %s")
+            params.append(operator)
+        sql = f"""
+            SELECT {group_by}, status, SUM(count) AS count,
+                   SUM(confidence_sum) AS confidence_sum, SUM(confidence_count) AS confidence_count,
+                   SUM(processing_time_sum) AS processing_time_sum,
+                   SUM(processing_time_count) AS processing_time_count
+            FROM inspection_rollups
+            WHERE {' AND '.join(where)}
+            GROUP BY {group_by}, status
+        """
+        with self._connection() as conn, conn.cursor() as cursor:
+            cursor.execute(sql, params)
+            return cursor.fetchall()
+
+    def _pending_matching(self, granularity, since, until, station=None, operator=None):
+        with self._lock:
+            sources = [d for d in (self._pending, self._flushing) if d]
+            items = [item for d in sources for item in d.rollups.items()]
+            defects = [item for d in sources for item in d.defects.items()]
+        match = lambda g, b, s, o: (g == granularity and since <= b < until
+                                    and (station is None or s == station)
+                                    and (operator is None or o == operator))
+        return ([(key, sums) for key, sums in items if match(*key[:4])],
+                [(key, count) for key, count in defects if match(*key[:4])])
+
+    def timeseries(self, granularity, since, until, station=None, operator=None):
+        """One point per bucket in [since, until) with totals and averages."""
+        buckets = defaultdict(_Totals)
+        for row in self._select("bucket_start", granularity, since, until, station, operator):
+            buckets[row["bucket_start"]].add_row(row)
+        pending, _ = self._pending_matching(granularity, since, until, station, operator)
+        for (_, bucket, _, _, status), sums in pending:
+            buckets[bucket].add_sums(status, sums)
+        return [dict(bucket=bucket.isoformat(), **buckets[bucket].as_dict()) for bucket in sorted(buckets)]
+
+    def breakdown(self, dimension, granularity, since, until, top_defects=5):
+        """Totals per station or operator over [since, until), with top defect types."""
+        if dimension not in ("station", "operator"):
+            raise ValueError(f"invalid dimension: {dimension!r}")
+        groups = defaultdict(_Totals)
+        for row in self._select(dimension, granularity, since, until):
+            groups[row[dimension]].add_row(row)
+
+        defects = defaultdict(lambda: defaultdict(int))
+        with self._connection() as conn, conn.cursor() as cursor:
+            cursor.execute(f"""
+                SELECT {dimension}, defect_type, SUM(count) AS count
+                FROM inspection_rollup_defects
+                WHERE granularity = %s AND bucket_start >= %s AND bucket_start < %s
+                GROUP BY {dimension}, defect_type
+            """, (granularity, since, until))
+            for row in cursor.fetchall():
+                defects[row[dimension]][row["defect_type"]] += int(row["count"])
+
+        pending, pending_defects = self._pending_matching(granularity, since, until)
+        index = 2 if dimension == "station" else 3
+        for key, sums in pending:
+            groups[key[index]].add_sums(key[4], sums)
+        for key, count in pending_defects:
+            defects[key[index]][key[4]] += count
+
+        result = []
+        for name in sorted(groups):
+            top = sorted(defects[name].items(), key=lambda item: -item[1])[:top_defects]
+            result.append(dict({dimension: name}, **groups[name].as_dict(),
+                               top_defects=[{"type": t, "count": c} for t, c in top]))
+        return result
+
+    # ------------------------------------------------------------------
+    # Backfill
+    # ------------------------------------------------------------------
+    def backfill(self, batch_keys=50000, archived_rows=()):
+        """Rebuild the rollup tables from the inspections table.
+
+        Only rows up to the max id seen at start are read, so inspections
+        ingested meanwhile are counted once, by the live path.
+        ``archived_rows`` (``Archiver.iter_rows()``) adds the rows moved out of
+        the hot table; the archiver must not run during a backfill.
+        """
+        with self._connection() as conn, conn.cursor() as cursor:
+            cursor.execute("SELECT COALESCE(MAX(id), 0) AS max_id FROM inspections")
+            max_id = cursor.fetchone()["max_id"]
+            cursor.execute("DELETE FROM inspection_rollups")
+            cursor.execute("DELETE FROM inspection_rollup_defects")
+
+        rows_read = 0
+        deltas = _Deltas()
+        with self._connection() as conn:
+            reader = conn.cursor(pymysql.cursors.SSDictCursor)
+            reader.execute("""
+                SELECT station, operator, status, confidence, processing_time, defects, timestamp
+                FROM inspections WHERE id <= %s
+            """, (max_id,))
+            with self._connection() as writer_conn, writer_conn.cursor() as writer:
+                for row in itertools.chain(reader.fetchall_unbuffered(), archived_rows):
+                    deltas.add(row)
+                    rows_read += 1
+                    if len(deltas.rollups) >= batch_keys:
+                        deltas.write(writer)
+                        deltas = _Deltas()
+                deltas.write(writer)
+            reader.close()
+        logger.info(f"✅ Rollups backfilled from {rows_read} inspections (id <= {max_id})")
+        return rows_read
+
+
+class _Totals:
+    __slots__ = ("total", "passed", "failed", "conf_sum", "conf_count", "pt_sum", "pt_count")
+
+    def __init__(self):
+        self.total = self.passed = self.failed = self.conf_count = self.pt_count = 0
+        self.conf_sum = self.pt_sum = 0.0
+
+    def add_sums(self, status, sums):
+        count, conf_sum, conf_count, pt_sum, pt_count = sums
+        self.total += count
+        if status == "passed":
+            self.passed += count
+        elif status == "failed":
+            self.failed += count
+        self.conf_sum += conf_sum
+        self.conf_count += conf_count
+        self.pt_sum += pt_sum
+        self.pt_count += pt_count
+
+    def add_row(self, row):
+        self.add_sums(row["status"], (
+            int(row["count"] or 0),
+            float(row["confidence_sum"] or 0), int(row["confidence_count"] or 0),
+            float(row["processing_time_sum"] or 0), int(row["processing_time_count"] or 0),
+        ))
+
+    def as_dict(self):
+        return {
+            "total": self.total,
+            "passed": self.passed,
+            "failed": self.failed,
+            "defect_rate": round(self.failed / self.total * 100, 2) if self.total else 0,
+            "avgConfidence": round(self.conf_sum / self.conf_count, 1) if self.conf_count else None,
+            "avgProcessingTime": round(self.pt_sum / self.pt_count, 2) if self.pt_count else None,
+        }
@@ -0,0 +1,97 @@
+"""Socket.IO rooms keyed by station and production line.
+
+A client that subscribes to nothing stays in the ``all`` room and keeps
+receiving every event, as before. A client that subscribes leaves ``all``
+and joins ``station:<name>`` / ``line:<line>`` rooms, so an emit for one
+station only reaches the clients watching that station or its line.
+"""
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+ALL_ROOM = "all"
+STATION_PREFIX = "station:"
+LINE_PREFIX = "line:"
+
+
+def station_room(name):
+    return STATION_PREFIX + str(name)
+
+
+def line_room(line):
+    return LINE_PREFIX + str(line)
+
+
+def is_filter_room(room):
+    return isinstance(room, str) and room.startswith((STATION_PREFIX, LINE_PREFIX))
+
+
+def parse_subscription(data):
+    """{"stations": [...], "lines": [...]} (lists or comma-separated strings) -> (stations, lines)"""
+    data = data or {}
+
+    def names(value):
+        if not value:
+            return []
+        if isinstance(value, str):
+            value = value.split(",")
+        if not isinstance(value, (list, tuple)):
+            raise ValueError("stations and lines must be lists or comma-separated strings")
+        return [str(item).strip() for item in value if str(item).strip()]
+
+    return names(data.get("stations")), names(data.get("lines"))
+
+
+class StationDirectory:
+    """station name -> line, read from the ``stations`` table.
+
+    The table is tiny and rarely written; it is re-read at most every
+    ``ttl`` seconds, or right away after ``invalidate()``.
+    """
+
+    def __init__(self, connection, ttl=60.0):
+        self._connection = connection
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._lines = None
+        self._loaded_at = 0.0
+
+    def lines(self):
+        with self._lock:
+            if self._lines is None or time.monotonic() - self._loaded_at > self.ttl:
+                try:
+                    with self._connection() as conn, conn.cursor() as cursor:
+                        cursor.execute("SELECT name, line FROM stations")
+                        self._lines = {row["name"]: row["line"] for row in cursor.fetchall()}
+                except Exception as e:
+                    logger.error(f"Error loading stations: {e}")
+                    if self._lines is None:
+                        return {}
+                self._loaded_at = time.monotonic()
+            return self._lines
+
+    def invalidate(self):
+        with self._lock:
+            self._loaded_at = 0.0
+
+    def rooms_for(self, inspection):
+        """Filter rooms an inspection is delivered to (``all`` excluded)."""
+        station = inspection.get("station")
+        rooms = [station_room(station)]
+        line = self.lines().get(station)
+        if line is not None:
+            rooms.append(line_room(line))
+        return tuple(rooms)
+
+    def stations_for(self, room):
+        """Stations whose inspections count towards a filter room."""
+        if room.startswith(STATION_PREFIX):
+            return [room[len(STATION_PREFIX):]]
+        line = room[len(LINE_PREFIX):]
+        return [station for station, station_line in self.lines().items() if str(station_line) == line]
+
+    def all_rooms(self):
+        lines = self.lines()
+        return [station_room(station) for station in lines] + [line_room(line) for line in set(lines.values())]
@@ -0,0 +1,138 @@
+"""Multi-worker support: Socket.IO fan-out through a message queue and
+leader election for the periodic jobs.
+
+Every worker publishes its emits on the queue configured in
+``SCALEOUT_CONFIG["message_queue"]`` (redis://, amqp://, kafka:// or
+``local://``), so a client receives broadcasts whichever process it is
+connected to. Only the worker holding the MySQL named lock computes and
+publishes the periodic stats.
+"""
+import logging
+import queue
+import threading
+import time
+
+import socketio
+
+logger = logging.getLogger(__name__)
+
+
+class LocalPubSubManager(socketio.PubSubManager):
+    """In-process stand-in for a Redis/AMQP queue.
+
+    Every manager created on the same channel in this process sees the
+    others' messages, which is enough to run several Socket.IO servers side
+    by side in tests and benchmarks without a broker.
+    """
+    name = "local"
+
+    _lock = threading.Lock()
+    _subscribers = {}  # channel -> [queue.Queue]
+
+    def _publish(self, data):
+        # Round-trip through JSON like a real broker would
+        message = self.json.dumps(data)
+        with self._lock:
+            subscribers = list(self._subscribers.get(self.channel, ()))
+        for subscriber in subscribers:
+            subscriber.put(message)
+
+    def _listen(self):
+        inbox = queue.Queue()
+        with self._lock:
+            self._subscribers.setdefault(self.channel, []).append(inbox)
+        try:
+            while True:
+                yield inbox.get()
+        finally:
+            with self._lock:
+                self._subscribers[self.channel].remove(inbox)
+
+
+def socketio_queue_options(config):
+    """SocketIO(...) keyword arguments for a SCALEOUT_CONFIG dict."""
+    url = config.get("message_queue")
+    if not url:
+        return {}
+    if url.startswith("local://"):
+        return {"client_manager": LocalPubSubManager(channel=config["channel"])}
+    return {"message_queue": url, "channel": config["channel"]}
+
+
+class LeaderElection:
+    """Leadership held through ``GET_LOCK`` on a dedicated MySQL session.
+
+    The lock lives as long as the session, so a crashed or partitioned
+    leader releases it automatically and another worker picks it up on its
+    next ``is_leader()`` call. The connection is not taken from the pool:
+    returning it would hand the lock to an unrelated request.
+    """
+
+    def __init__(self, connect, name, retry_interval=10.0):
+        self.connect = connect
+        self.name = name
+        self.retry_interval = retry_interval
+        self._lock = threading.Lock()
+        self._conn = None
+        self._leader = False
+        self._next_attempt = 0.0
+
+    @property
+    def held(self):
+        """Leadership as of the last check (no round trip)."""
+        return self._leader
+
+    def is_leader(self):
+        with self._lock:
+            if self._leader:
+                if self._still_held():
+                    return True
+                logger.warning(f"👑 Leadership lost ({self.name})")
+                self._reset()
+            if time.monotonic() >= self._next_attempt:
+                self._next_attempt = time.monotonic() + self.retry_interval
+                self._leader = self._try_acquire()
+                if self._leader:
+                    logger.info(f"👑 This worker is now the leader ({self.name})")
+            return self._leader
+
+    def release(self):
+        with self._lock:
+            if self._leader:
+                try:
+                    with self._conn.cursor() as cursor:
+                        cursor.execute("SELECT RELEASE_LOCK(%s)", (self.name,))
+                except Exception as e:
+                    logger.warning(f"Could not release leader lock: {e}")
+            self._reset()
+
+    def _try_acquire(self):
+        try:
+            if self._conn is None:
+                self._conn = self.connect()
+            with self._conn.cursor() as cursor:
+                cursor.execute("SELECT GET_LOCK(%s, 0) AS acquired", (self.name,))
+                row = cursor.fetchone()
+            return bool(row and row["acquired"] == 1)
+        except Exception as e:
+            logger.warning(f"Leader election failed: {e}")
+            self._reset()
+            return False
+
+    def _still_held(self):
+        try:
+            with self._conn.cursor() as cursor:
+                cursor.execute("SELECT IS_USED_LOCK(%s) = CONNECTION_ID() AS held", (self.name,))
+                row = cursor.fetchone()
+            return bool(row and row["held"])
+        except Exception:
+            return False
+
+    def _reset(self):
+        self._leader = False
+        if self._conn is not None:
+            try:
+                self._conn.close()
+            except Exception:
+                pass
+            self._conn = None
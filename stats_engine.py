@@ -0,0 +1,206 @@
+"""In-process inspection counters behind get_stats().
+
+The engine is seeded with a single aggregate query, then kept current in
+O(1) per inspection inserted through the API. A periodic reconcile re-reads
+the aggregate so writes made outside this process (other workers, manual
+SQL) are folded back in. Archived inspections count through the
+``archive_totals`` table. Counters are kept per station so Socket.IO rooms
+can get stats for just the stations they watch.
+"""
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Per-station sums over a set of inspections; archiver.py folds the same
+# sums into archive_totals when it moves rows out of the hot table.
+COUNTER_COLUMNS = """
+           COUNT(*) AS total,
+           COALESCE(SUM(status = 'passed'), 0) AS passed,
+           COALESCE(SUM(status = 'failed'), 0) AS failed,
+           COALESCE(SUM(CASE WHEN processing_time > 0 THEN processing_time END), 0) AS pt_sum,
+           COALESCE(SUM(processing_time > 0), 0) AS pt_count,
+           COALESCE(SUM(CASE WHEN confidence > 0 THEN confidence END), 0) AS conf_sum,
+           COALESCE(SUM(confidence > 0), 0) AS conf_count"""
+
+# Hot rows plus the totals of archived ones, read in one statement so a
+# batch being archived is counted exactly once.
+SEED_QUERY = f"""
+    SELECT station, SUM(total) AS total, SUM(passed) AS passed, SUM(failed) AS failed,
+           SUM(pt_sum) AS pt_sum, SUM(pt_count) AS pt_count,
+           SUM(conf_sum) AS conf_sum, SUM(conf_count) AS conf_count,
+           MAX(max_id) AS max_id
+    FROM (
+        SELECT station, {COUNTER_COLUMNS},
+               COALESCE(MAX(id), 0) AS max_id
+        FROM inspections
+        GROUP BY station
+        UNION ALL
+        SELECT station, total, passed, failed, pt_sum, pt_count, conf_sum, conf_count, 0 AS max_id
+        FROM archive_totals
+    ) AS counters
+    GROUP BY station
+"""
+
+DEFAULT_AVG_PROCESSING_TIME = 2.1
+DEFAULT_AVG_CONFIDENCE = 95.0
+
+
+class _Counters:
+    __slots__ = ("total", "passed", "failed", "pt_sum", "pt_count", "conf_sum", "conf_count")
+
+    def __init__(self, row=None):
+        row = row or {}
+        self.total = int(row.get("total") or 0)
+        self.passed = int(row.get("passed") or 0)
+        self.failed = int(row.get("failed") or 0)
+        self.pt_sum = float(row.get("pt_sum") or 0)
+        self.pt_count = int(row.get("pt_count") or 0)
+        self.conf_sum = float(row.get("conf_sum") or 0)
+        self.conf_count = int(row.get("conf_count") or 0)
+
+    def add(self, inspection):
+        self.total += 1
+        if inspection.get("status") == "passed":
+            self.passed += 1
+        elif inspection.get("status") == "failed":
+            self.failed += 1
+        processing_time = float(inspection.get("processing_time") or 0)
+        if processing_time > 0:
+            self.pt_sum += processing_time
+            self.pt_count += 1
+        confidence = float(inspection.get("confidence") or 0)
+        if confidence > 0:
+            self.conf_sum += confidence
+            self.conf_count += 1
+
+    def merge(self, other):
+        for name in self.__slots__:
+            setattr(self, name, getattr(self, name) + getattr(other, name))
+
+
+def format_stats(counters):
+    """Build the dict shape the dashboard consumes from raw counters."""
+    total, passed, failed = counters.total, counters.passed, counters.failed
+    avg_processing_time = counters.pt_sum / counters.pt_count if counters.pt_count else DEFAULT_AVG_PROCESSING_TIME
+    avg_confidence = counters.conf_sum / counters.conf_count if counters.conf_count else DEFAULT_AVG_CONFIDENCE
+    defect_rate = (failed / total * 100) if total > 0 else 0
+    efficiency = (passed / total * 100) if total > 0 else 100
+
+    return {
+        "total": total,
+        "passed": passed,
+        "failed": failed,
+        "defect_rate": round(defect_rate, 2),
+        # Additional metrics for frontend compatibility
+        "totalInspections": total,
+        "conformeCount": passed,
+        "nonConformeCount": failed,
+        "avgProcessingTime": round(avg_processing_time, 2),
+        "efficiency": round(efficiency, 1),
+        "uptime": 98.5,  # Static for now
+        "avgConfidence": round(avg_confidence, 1)
+    }
+
+
+class StatsEngine:
+    """Running totals over the inspections table.
+
+    ``connection`` is a zero-argument callable returning a context manager
+    that yields a DB connection (``backend.db_connection``).
+    """
+
+    def __init__(self, connection, reconcile_interval=300.0):
+        self._connection = connection
+        self.reconcile_interval = reconcile_interval
+
+        self._lock = threading.Lock()
+        self._reconcile_lock = threading.RLock()
+        self._counters = None
+        self._by_station = {}
+        self._pending = None  # inspections recorded while a reconcile is in flight
+        self._last_reconcile = 0.0
+        self.reconcile_count = 0
+
+    @property
+    def seeded(self):
+        return self._counters is not None
+
+    def record(self, inspection):
+        """Fold one freshly inserted inspection (with its ``id``) into the totals."""
+        self.record_many((inspection,))
+
+    def record_many(self, inspections):
+        with self._lock:
+            for inspection in inspections:
+                if self._pending is not None:
+                    self._pending.append(inspection)
+                if self._counters is not None:
+                    self._counters.add(inspection)
+                    self._station_counters(inspection.get("station")).add(inspection)
+
+    def reconcile(self):
+        """Re-seed the counters from one aggregate query (one row per station)."""
+        with self._reconcile_lock:
+            with self._lock:
+                self._pending = []
+            try:
+                with self._connection() as conn, conn.cursor() as cursor:
+                    cursor.execute(SEED_QUERY)
+                    rows = cursor.fetchall()
+            except Exception:
+                with self._lock:
+                    self._pending = None
+                raise
+
+            counters = _Counters()
+            by_station = {}
+            for row in rows:
+                by_station[row["station"]] = station_counters = _Counters(row)
+                counters.merge(station_counters)
+            max_id = max((int(row.get("max_id") or 0) for row in rows), default=0)
+            with self._lock:
+                # Rows committed after the aggregate was read are not in it yet.
+                for inspection in self._pending:
+                    if (inspection.get("id") or 0) > max_id:
+                        counters.add(inspection)
+                        by_station.setdefault(inspection.get("station"), _Counters()).add(inspection)
+                if self._counters is not None and self._counters.total != counters.total:
+                    logger.info(f"📊 Stats reconciled: {self._counters.total} -> {counters.total} inspections")
+                self._counters = counters
+                self._by_station = by_station
+                self._pending = None
+                self._last_reconcile = time.monotonic()
+                self.reconcile_count += 1
+
+    def maybe_reconcile(self):
+        """Reconcile if the schedule says so; returns True when it ran."""
+        if self.seeded and time.monotonic() - self._last_reconcile < self.reconcile_interval:
+            return False
+        self.reconcile()
+        return True
+
+    def snapshot(self, stations=None):
+        """Current stats in the dashboard dict shape; seeds on first use.
+
+        With ``stations``, only inspections from those stations are counted.
+        """
+        if not self.seeded:
+            with self._reconcile_lock:
+                if not self.seeded:
+                    self.reconcile()
+        with self._lock:
+            if stations is None:
+                return format_stats(self._counters)
+            counters = _Counters()
+            for station in stations:
+                if station in self._by_station:
+                    counters.merge(self._by_station[station])
+            return format_stats(counters)
+
+    def _station_counters(self, station):
+        counters = self._by_station.get(station)
+        if counters is None:
+            counters = self._by_station[station] = _Counters()
+        return counters
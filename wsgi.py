@@ -0,0 +1,26 @@
+"""WSGI entry point for gunicorn.
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+The green-thread libraries must patch the standard library before anything
+else imports socket/threading (pymysql, the connection pool, flask), so the
+patching happens here, ahead of the backend import. pymysql is pure Python, so once patched its
+socket I/O yields to other green threads, and the connection pool's locks
+and conditions become green as well: a query blocks only its own request.
+"""
+import os
+
+ASYNC_MODE = os.environ.setdefault("ASYNC_MODE", "eventlet")
+
+if ASYNC_MODE == "eventlet":
+    import eventlet
+    eventlet.monkey_patch()
+elif ASYNC_MODE == "gevent":
+    from gevent import monkey
+    monkey.patch_all()
+
+from backend import create_app, socketio  # noqa: E402
+
+app = create_app()
+
+__all__ = ["app", "socketio"]